@@ -0,0 +1,144 @@
+import os
+import pytest
+import shutil
+from conftest import FILTER_GENOMES, GENOMES, SUMMARY_ROWS, THREADS
+from generators import accession, assembly_summary, filtered_sequences
+
+pytest.importorskip("pytest_benchmark")
+
+from CorGE.AssemblySummary import AssemblySummary
+from CorGE.FilteredSequences import FilteredSequences
+from CorGE.GeneCollection import GeneCollection
+from CorGE.GenomeCollection import GenomeCollection
+
+
+@pytest.fixture(scope="module")
+def summaries(tmp_path_factory):
+    """Returns a function making (once per size) an output directory holding an
+    assembly_summary.txt of n genomes, and its species"""
+    made = {}
+
+    def make(n: int) -> tuple:
+        if n not in made:
+            output_fp = tmp_path_factory.mktemp(f"summary-{n}")
+            species = assembly_summary(str(output_fp / "assembly_summary.txt"), n)
+            made[n] = (str(output_fp), species)
+        return made[n]
+
+    return make
+
+
+def output(tmp_path, genomes_fp: str) -> str:
+    """Makes an output directory next to a link to genomes_fp, like collect leaves"""
+    os.symlink(genomes_fp, tmp_path / "genomes")
+    return str(tmp_path / "genomes")
+
+
+@pytest.mark.parametrize("n", SUMMARY_ROWS)
+def test_assembly_summary_index(benchmark, summaries, n):
+    output_fp, _ = summaries(n)
+    summary_fp = os.path.join(output_fp, "assembly_summary.txt")
+    db_fp = os.path.join(output_fp, "assembly_summary.sqlite")
+
+    def setup():
+        if os.path.exists(db_fp):
+            os.remove(db_fp)
+
+    benchmark.pedantic(
+        lambda: AssemblySummary(summary_fp).close(), setup=setup, rounds=3
+    )
+
+
+@pytest.mark.parametrize("n", SUMMARY_ROWS)
+def test_assembly_summary_select(benchmark, summaries, n):
+    output_fp, species = summaries(n)
+    summary = AssemblySummary(os.path.join(output_fp, "assembly_summary.txt"))
+    # 100 taxa and 100 accessions spread over the file, plus every representative
+    selected = species[:: max(1, len(species) // 100)][:100]
+    accs = [accession(i) for i in range(0, n, max(1, n // 100))][:100]
+
+    rows = benchmark(summary.select, selected, accs, True)
+    summary.close()
+    assert len(rows) >= len(accs)
+
+
+@pytest.mark.parametrize("all_species", [False, True], ids=["species", "all"])
+@pytest.mark.parametrize("n", GENOMES)
+def test_genome_collection_select(benchmark, summaries, n, all_species):
+    output_fp, species = summaries(n)
+    # A tenth of the species plus a few accessions, the index is already built
+    selected = species[::10]
+    accs = [accession(i) for i in range(0, n, 100)]
+    AssemblySummary(os.path.join(output_fp, "assembly_summary.txt")).close()
+
+    gc = benchmark(
+        GenomeCollection,
+        output_fp,
+        ncbi_species=selected,
+        ncbi_accessions=accs,
+        all_species=all_species,
+    )
+    assert len(gc.genomes) >= len(accs)
+
+
+@pytest.mark.parametrize("threads", THREADS)
+@pytest.mark.parametrize("n", FILTER_GENOMES)
+def test_filter_prot(benchmark, tmp_path, genomes, hmm_fp, n, threads):
+    genomes_fp = output(tmp_path, genomes(n))
+    output_fp = str(tmp_path / "output")
+    # Grouped by genome count so the table compares thread counts side by side
+    benchmark.group = f"filter_prot {n} genomes"
+
+    def setup():
+        shutil.rmtree(output_fp, ignore_errors=True)
+        os.makedirs(output_fp)
+        shutil.copy(hmm_fp, output_fp)
+        return (
+            GeneCollection(genomes_fp, output_fp, layout="packed", threads=threads),
+        ), {}
+
+    benchmark.pedantic(GeneCollection.filter_prot, setup=setup, rounds=1)
+    assert FilteredSequences(
+        os.path.join(output_fp, "filtered-sequences"), ".faa"
+    ).names()
+
+
+@pytest.mark.parametrize("n", FILTER_GENOMES)
+def test_filter_nucl(benchmark, tmp_path, genomes, hmm_fp, n):
+    genomes_fp = output(tmp_path, genomes(n))
+    output_fp = str(tmp_path / "output")
+    os.makedirs(output_fp)
+    shutil.copy(hmm_fp, output_fp)
+    GeneCollection(genomes_fp, output_fp, "nucl", layout="packed").filter_prot()
+
+    def setup():
+        # Indices are rebuilt too, as on a first run
+        for fp in ["filtered-nucl-sequences", "genome-indices"]:
+            shutil.rmtree(os.path.join(output_fp, fp), ignore_errors=True)
+        return (GeneCollection(genomes_fp, output_fp, "nucl", layout="packed"),), {}
+
+    benchmark.pedantic(GeneCollection.filter_nucl, setup=setup, rounds=3)
+    assert FilteredSequences(
+        os.path.join(output_fp, "filtered-nucl-sequences"), ".fna"
+    ).names()
+
+
+@pytest.mark.parametrize("n", GENOMES)
+def test_merge(benchmark, tmp_path, n):
+    output_fp = str(tmp_path / "output")
+    os.makedirs(os.path.join(output_fp, "genomes"))
+    gc = GeneCollection(
+        os.path.join(output_fp, "genomes"), output_fp, name_type="acc", layout="packed"
+    )
+    os.makedirs(gc.filtered_fp)
+    filtered_sequences(gc.filtered, [accession(i) for i in range(n)])
+
+    def setup():
+        # Start from an empty merged-sequences so every file is written
+        shutil.rmtree(gc.merged_fp, ignore_errors=True)
+        os.makedirs(gc.merged_fp)
+        if os.path.exists(gc.merged_manifest_fp):
+            os.remove(gc.merged_manifest_fp)
+
+    benchmark.pedantic(gc.merge, setup=setup, rounds=3)
+    assert len(os.listdir(gc.merged_fp)) == 71
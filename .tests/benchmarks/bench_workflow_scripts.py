@@ -0,0 +1,85 @@
+import io
+import os
+import pytest
+from conftest import COLUMNS, TAXA
+from generators import alignment
+
+pytest.importorskip("pytest_benchmark")
+
+from create_supermatrix import build_supermatrix, write_supermatrix
+from reduce_alignments import read_alignment, reduce_file
+from reduce_alignments_stats import MSA
+
+GENES = 71
+
+
+@pytest.fixture(scope="module")
+def alignments(tmp_path_factory):
+    """Returns a function making (once per size) an aligned FASTA of taxa x COLUMNS"""
+    made = {}
+
+    def make(taxa: int) -> str:
+        if taxa not in made:
+            fp = tmp_path_factory.mktemp(f"aligned-{taxa}") / "gene_00.fasta"
+            alignment(str(fp), taxa, COLUMNS)
+            made[taxa] = str(fp)
+        return made[taxa]
+
+    return make
+
+
+@pytest.fixture(scope="module")
+def reduced(tmp_path_factory):
+    """Returns a function making (once per size) GENES reduced alignments, each
+    missing a different tenth of the taxa"""
+    made = {}
+
+    def make(taxa: int) -> list:
+        if taxa not in made:
+            fp = tmp_path_factory.mktemp(f"reduced-{taxa}")
+            made[taxa] = []
+            for g in range(GENES):
+                gene_fp = str(fp / f"gene_{g:02d}.fasta")
+                names = alignment(gene_fp, taxa, 100, seed=g, gap_rate=0.05)
+                with open(gene_fp) as f:
+                    records = read_alignment(f)
+                with open(gene_fp, "w") as f:
+                    for i, (header, seq) in enumerate(records):
+                        if i % 10 != g % 10:
+                            f.write(f"{header}\n{seq}\n")
+                made[taxa].append(gene_fp)
+        return made[taxa]
+
+    return make
+
+
+@pytest.mark.parametrize("taxa", TAXA)
+def test_column_stats(benchmark, alignments, taxa):
+    with open(alignments(taxa)) as f:
+        msa = MSA.from_seqs(read_alignment(f))
+
+    stats = benchmark(lambda: list(msa.column_stats()))
+    assert len(stats) == COLUMNS
+
+
+@pytest.mark.parametrize("stats", [False, True], ids=["reduced", "with-stats"])
+@pytest.mark.parametrize("taxa", TAXA)
+def test_reduce_alignments(benchmark, tmp_path, alignments, taxa, stats):
+    reduced_fp = str(tmp_path / "gene_00.fasta")
+    stats_fp = str(tmp_path / "gene_00.stats") if stats else None
+
+    benchmark(reduce_file, alignments(taxa), reduced_fp, 100, stats_fp)
+    assert os.path.getsize(reduced_fp)
+
+
+@pytest.mark.parametrize("taxa", TAXA)
+def test_create_supermatrix(benchmark, reduced, taxa):
+    fps = reduced(taxa)
+
+    def create():
+        gids, genes, matrix = build_supermatrix(fps)
+        write_supermatrix(gids, matrix, io.StringIO())
+        return matrix
+
+    matrix = benchmark(create)
+    assert matrix.shape == (taxa, GENES * 100)
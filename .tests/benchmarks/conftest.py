@@ -0,0 +1,75 @@
+import os
+import pytest
+import shutil
+import sys
+
+BENCH_FP = os.path.dirname(os.path.realpath(__file__))
+REPO_FP = os.path.dirname(os.path.dirname(BENCH_FP))
+TEST_GENOMES_FP = os.path.join(
+    REPO_FP, "CorGE", "tests", "test-data", "collected-genomes"
+)
+
+sys.path.insert(0, BENCH_FP)
+sys.path.insert(0, os.path.join(REPO_FP, "workflow", "scripts"))
+
+
+def sizes(var: str, default: str) -> list:
+    """Reads a comma separated list of sizes, e.g. CORGE_BENCH_GENOMES=1000,10000,100000"""
+    return [int(s) for s in os.environ.get(var, default).split(",") if s]
+
+
+# Scaling curves are taken over these, raise them for release comparisons
+GENOMES = sizes("CORGE_BENCH_GENOMES", "1000,10000")
+# RefSeq bacteria's assembly_summary.txt is around 500k rows
+SUMMARY_ROWS = sizes("CORGE_BENCH_SUMMARY_ROWS", "125000,250000,500000")
+FILTER_GENOMES = sizes("CORGE_BENCH_FILTER_GENOMES", "2,8")
+THREADS = sizes("CORGE_BENCH_THREADS", "1,2,4")
+TAXA = sizes("CORGE_BENCH_TAXA", "1000,10000")
+COLUMNS = sizes("CORGE_BENCH_COLUMNS", "1000")[0]
+PROTEINS = sizes("CORGE_BENCH_PROTEINS", "3500")[0]
+
+
+@pytest.fixture(scope="session")
+def templates():
+    """Real proteins from the test genomes, so mutated copies still hit the SCCG HMMs"""
+    from generators import read_fasta
+
+    return [
+        seq
+        for fp in sorted(os.listdir(TEST_GENOMES_FP))
+        if fp.endswith(".faa")
+        for _, seq in read_fasta(os.path.join(TEST_GENOMES_FP, fp))
+    ]
+
+
+@pytest.fixture(scope="session")
+def hmm_fp(tmp_path_factory):
+    """Fetches genes.hmm.gz once through a real filter_prot run on one test genome"""
+    from CorGE.GeneCollection import GeneCollection
+
+    fp = tmp_path_factory.mktemp("profiles")
+    genomes_fp = fp / "genomes"
+    genomes_fp.mkdir()
+    shutil.copy(os.path.join(TEST_GENOMES_FP, "GCF_000010525.1.faa"), genomes_fp)
+    GeneCollection(str(genomes_fp), str(fp / "output"), press_hmms=False).filter_prot()
+    return str(fp / "output" / "genes.hmm.gz")
+
+
+@pytest.fixture(scope="session")
+def genomes(tmp_path_factory, templates):
+    """Returns a function making (once per size) a genomes directory of n synthetic
+    RefSeq sized genomes with proteomes and CDS files"""
+    from generators import accession, genome
+
+    made = {}
+
+    def make(n: int) -> str:
+        if n not in made:
+            fp = tmp_path_factory.mktemp(f"genomes-{n}") / "genomes"
+            fp.mkdir()
+            for i in range(n):
+                genome(str(fp), accession(i), templates, PROTEINS, seed=i)
+            made[n] = str(fp)
+        return made[n]
+
+    return make
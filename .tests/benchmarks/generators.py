@@ -0,0 +1,167 @@
+import numpy as np
+import os
+import random
+
+AMINO = "ACDEFGHIKLMNPQRSTVWY"
+CODONS = {
+    "A": "GCT",
+    "C": "TGT",
+    "D": "GAT",
+    "E": "GAA",
+    "F": "TTT",
+    "G": "GGT",
+    "H": "CAT",
+    "I": "ATT",
+    "K": "AAA",
+    "L": "CTG",
+    "M": "ATG",
+    "N": "AAT",
+    "P": "CCG",
+    "Q": "CAG",
+    "R": "CGT",
+    "S": "TCT",
+    "T": "ACC",
+    "V": "GTT",
+    "W": "TGG",
+    "Y": "TAT",
+}
+SUMMARY_HEADER = [
+    "assembly_accession",
+    "bioproject",
+    "biosample",
+    "wgs_master",
+    "refseq_category",
+    "taxid",
+    "species_taxid",
+    "organism_name",
+    "infraspecific_name",
+    "isolate",
+    "version_status",
+    "assembly_level",
+    "release_type",
+    "genome_rep",
+    "seq_rel_date",
+    "asm_name",
+    "submitter",
+    "gbrs_paired_asm",
+    "paired_asm_comparison",
+    "ftp_path",
+    "excluded_from_refseq",
+    "relation_to_type_material",
+    "asm_not_live_date",
+]
+
+
+def accession(i: int) -> str:
+    return f"GCF_{i:09d}.1"
+
+
+def assembly_summary(fp: str, n_genomes: int, seed: int = 0) -> list:
+    """Writes an assembly_summary.txt with n_genomes rows, about three per species
+    with the first one representative, returns the species taxon ids"""
+    rnd = random.Random(seed)
+    species = [str(100000 + i) for i in range(max(1, n_genomes // 3))]
+    seen = set()
+    with open(fp, "w") as f:
+        f.write(
+            "#   See ftp://ftp.ncbi.nlm.nih.gov/genomes/README_assembly_summary.txt\n"
+        )
+        f.write("# " + "\t".join(SUMMARY_HEADER) + "\n")
+        for i in range(n_genomes):
+            tx_id = rnd.choice(species)
+            acc = accession(i)
+            row = dict.fromkeys(SUMMARY_HEADER, "")
+            row.update(
+                assembly_accession=acc,
+                refseq_category="na" if tx_id in seen else "representative genome",
+                taxid=tx_id,
+                species_taxid=tx_id,
+                organism_name=f"Species {tx_id}",
+                infraspecific_name=f"strain=S{i}",
+                version_status="latest",
+                ftp_path=f"https://ftp.ncbi.nlm.nih.gov/genomes/all/{acc}_ASM{i}v1",
+            )
+            seen.add(tx_id)
+            f.write("\t".join(row.values()) + "\n")
+    return species
+
+
+def read_fasta(fp: str) -> list:
+    records = []
+    with open(fp) as f:
+        for line in f:
+            if line[0] == ">":
+                records.append((line[1:].strip(), []))
+            else:
+                records[-1][1].append(line.strip())
+    return [(header, "".join(seq)) for header, seq in records]
+
+
+def mutate(seq: str, rate: float, rnd: random.Random) -> str:
+    return "".join(rnd.choice(AMINO) if rnd.random() < rate else c for c in seq)
+
+
+def genome(
+    genomes_fp: str,
+    name: str,
+    templates: list,
+    n_proteins: int = 3500,
+    seed: int = 0,
+    nucl: bool = True,
+):
+    """Writes {name}.faa and {name}.fna shaped like a RefSeq genome, proteins are
+    mutated copies of templates (pass real proteomes to get SCCG hits) and CDS
+    records are back-translations keyed by protein ID like NCBI's"""
+    rnd = random.Random(seed)
+    with open(os.path.join(genomes_fp, f"{name}.faa"), "w") as faa, (
+        open(os.path.join(genomes_fp, f"{name}.fna"), "w")
+        if nucl
+        else open(os.devnull, "w")
+    ) as fna:
+        for i in range(n_proteins):
+            pid = f"WP_{seed:06d}{i:06d}.1"
+            seq = mutate(rnd.choice(templates), 0.05, rnd)
+            faa.write(f">{pid} protein {i} [{name}]\n")
+            faa.write("".join(f"{seq[j:j + 80]}\n" for j in range(0, len(seq), 80)))
+            cds = "".join(CODONS.get(c, "NNN") for c in seq) + "TAA"
+            fna.write(f">lcl|NC_{seed:06d}.1_cds_{pid}_{i + 1} [protein_id={pid}]\n")
+            fna.write("".join(f"{cds[j:j + 80]}\n" for j in range(0, len(cds), 80)))
+
+
+def alignment(
+    fp: str, taxa: int, length: int, seed: int = 0, gap_rate: float = 0.2
+) -> list:
+    """Writes an aligned FASTA of taxa x length with wrapped lines, returns the names"""
+    rng = np.random.default_rng(seed)
+    amino = np.frombuffer(AMINO.encode(), np.uint8)
+    # Each column leans towards one residue so their entropies differ
+    bias = rng.choice(amino, length)
+    arr = np.where(
+        rng.random((taxa, length)) < 0.6, bias, rng.choice(amino, (taxa, length))
+    )
+    arr[rng.random((taxa, length)) < gap_rate] = ord("-")
+    names = [str(1000 + t) for t in range(taxa)]
+    with open(fp, "w") as f:
+        for name, row in zip(names, arr):
+            seq = row.tobytes().decode()
+            f.write(f"> {name}\n")
+            f.write("".join(f"{seq[j:j + 60]}\n" for j in range(0, len(seq), 60)))
+    return names
+
+
+def filtered_sequences(filtered, names: list, genes: int = 71, seed: int = 0):
+    """Fills a FilteredSequences with one hit per gene for each of names"""
+    rng = np.random.default_rng(seed)
+    amino = np.frombuffer(AMINO.encode(), np.uint8)
+    for n, name in enumerate(names):
+        filtered.write(
+            name,
+            [
+                (
+                    f"gene_{g:02d}",
+                    f"WP_{n:06d}{g:03d}.1 protein {g} [{name}]",
+                    rng.choice(amino, 300).tobytes().decode(),
+                )
+                for g in range(genes)
+            ],
+        )
@@ -0,0 +1,61 @@
+import os
+import shutil
+import sys
+
+from pathlib import Path
+import subprocess as sp
+from tempfile import TemporaryDirectory
+
+sys.path.insert(0, os.path.dirname(__file__))
+sys.path.insert(
+    0, os.path.join(os.path.dirname(__file__), "..", "..", "workflow", "scripts")
+)
+from root_tree import parse_newick
+
+
+def test_fasttree_run():
+    with TemporaryDirectory() as tmpdir_path:
+        tmpdir = Path(tmpdir_path) / "workdir"
+        os.makedirs(tmpdir)
+        tmpdir = str(tmpdir)
+
+        shutil.copyfile(
+            ".tests/integration/fasttree_supermatrix_run/data/config.yml",
+            os.path.join(tmpdir, "config.yml"),
+        )
+        shutil.copytree(
+            ".tests/integration/fasttree_supermatrix_run/data/merged-sequences/",
+            os.path.join(tmpdir, "merged-sequences/"),
+        )
+
+        with open(os.path.join(tmpdir, "config.yml"), "a") as f:
+            f.write(f"\nDATA: {tmpdir}")
+
+        os.system("conda config --set channel_priority strict")
+
+        # Run the test job.
+        sp.check_output(
+            [
+                "snakemake",
+                "all",
+                "-c",
+                "--conda-frontend",
+                "conda",
+                "--use-conda",
+                "--conda-prefix",
+                ".snakemake/",
+                "--configfile",
+                os.path.join(tmpdir, "config.yml"),
+            ]
+        )
+
+        # Check output
+        tree_fp = os.path.join(str(tmpdir), "FastTree.supermatrix")
+        if not os.path.exists(tree_fp):
+            raise ValueError("Fasttree run did not produce FastTree.supermatrix")
+
+        # Rooted on the outgroup's branch
+        with open(tree_fp) as f:
+            root = parse_newick(f.read())
+        if "2173" not in [child.name for child in root.children]:
+            raise ValueError("FastTree.supermatrix isn't rooted on outgroup 2173")
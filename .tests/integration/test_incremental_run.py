@@ -0,0 +1,95 @@
+import os
+import shutil
+import sys
+
+from pathlib import Path
+import subprocess as sp
+from tempfile import TemporaryDirectory
+
+# The CorGE tree under test, not whichever copy happens to be installed
+sys.path.insert(0, os.path.join(os.path.dirname(__file__), "..", "..", "CorGE", "src"))
+from CorGE.IncrementalMerge import IncrementalMerge
+
+GENES = ["COG0012", "COG0016", "COG0018"]
+ADDED = "GCF_999999995.1"
+
+
+def run(tmpdir: str):
+    sp.check_output(
+        [
+            "snakemake",
+            "all",
+            "-c",
+            "--conda-frontend",
+            "conda",
+            "--use-conda",
+            "--conda-prefix",
+            ".snakemake/",
+            "--configfile",
+            os.path.join(tmpdir, "config.yml"),
+        ]
+    )
+
+
+def aligned(tmpdir: str, gene: str) -> dict:
+    records = IncrementalMerge.read_fasta(
+        os.path.join(tmpdir, "aligned-sequences", f"{gene}.fasta")
+    )
+    return {name: IncrementalMerge.residues_hash(seq) for name, seq in records}
+
+
+def test_incremental_run():
+    with TemporaryDirectory() as tmpdir_path:
+        tmpdir = Path(tmpdir_path) / "workdir"
+        os.makedirs(tmpdir)
+        tmpdir = str(tmpdir)
+
+        shutil.copyfile(
+            ".tests/integration/incremental_run/data/config.yml",
+            os.path.join(tmpdir, "config.yml"),
+        )
+        shutil.copytree(
+            ".tests/integration/incremental_run/data/merged-sequences/",
+            os.path.join(tmpdir, "merged-sequences/"),
+        )
+
+        with open(os.path.join(tmpdir, "config.yml"), "a") as f:
+            f.write(f"\nDATA: {tmpdir}")
+
+        os.system("conda config --set channel_priority strict")
+
+        # First run has nothing to extend and builds everything
+        run(tmpdir)
+        first = {gene: aligned(tmpdir, gene) for gene in GENES}
+
+        # Add a genome to every gene, as extract_genes --incremental would
+        merged_fp = os.path.join(tmpdir, "merged-sequences")
+        for gene in GENES:
+            fp = os.path.join(merged_fp, f"{gene}.fasta")
+            _, seq = IncrementalMerge.read_fasta(fp)[0]
+            seq = "".join(
+                ("G" if c == "A" else "A") if i % 10 == 0 else c
+                for i, c in enumerate(seq)
+            )
+            with open(fp, "a") as f:
+                f.write(f"> {ADDED}\n{seq}\n")
+        added = IncrementalMerge(tmpdir).update(merged_fp, GENES)
+        if added != {gene: 1 for gene in GENES}:
+            raise ValueError(f"Expected one added sequence per gene, got {added}")
+
+        # Second run extends the last alignments and trees with the new genome
+        run(tmpdir)
+        for gene in GENES:
+            second = aligned(tmpdir, gene)
+            if {k: v for k, v in second.items() if k != ADDED} != first[gene]:
+                raise ValueError(f"Incremental run changed {gene}'s aligned sequences")
+            if ADDED not in second:
+                raise ValueError(f"Incremental run didn't align {ADDED} in {gene}")
+            with open(os.path.join(tmpdir, "trees", f"RAxML_bestTree.{gene}")) as f:
+                if ADDED not in f.read():
+                    raise ValueError(f"Incremental run didn't place {ADDED} in {gene}")
+
+        # Check output
+        with open(os.path.join(str(tmpdir), "RAxML_bestTree.outgroup")) as f:
+            if ADDED not in f.read():
+                raise ValueError(f"RAxML_bestTree.outgroup is missing {ADDED}")
@@ -0,0 +1,49 @@
+import os
+import pytest
+import sys
+
+sys.path.insert(
+    0, os.path.join(os.path.dirname(__file__), "..", "..", "workflow", "scripts")
+)
+from root_tree import parse_newick, reroot, write_newick
+
+
+def rooted(newick: str, outgroup: str) -> str:
+    return write_newick(reroot(parse_newick(newick), outgroup))
+
+
+def test_trifurcating_root():
+    # FastTree leaves three children at the root, the outgroup's branch is halved
+    assert (
+        rooted("(A:0.1,B:0.2,(C:0.3,D:0.4)0.95:0.5);", "A")
+        == "(A:0.05,(B:0.2,(C:0.3,D:0.4)0.95:0.5):0.05);"
+    )
+
+
+def test_support_moves_with_reversed_edges():
+    # The 0.95 above (C,D) labels the same edge once it points at the old root
+    assert (
+        rooted("(A:0.1,B:0.2,(C:0.3,D:0.4)0.95:0.5);", "D")
+        == "(D:0.2,(C:0.3,(A:0.1,B:0.2)0.95:0.5):0.2);"
+    )
+
+
+def test_bifurcating_root_is_folded():
+    assert (
+        rooted("((A:0.1,B:0.2)0.8:0.3,(C:0.3,D:0.4)0.9:0.5);", "D")
+        == "(D:0.2,(C:0.3,(A:0.1,B:0.2)0.8:0.8):0.2);"
+    )
+
+
+def test_quoted_names():
+    tree = parse_newick("('Escherichia coli':0.1,'B''s b':0.2,C:0.3);")
+    assert [leaf.name for leaf in tree.children] == ["Escherichia coli", "B's b", "C"]
+    assert (
+        rooted("('Escherichia coli':0.1,'B''s b':0.2,C:0.3);", "Escherichia coli")
+        == "('Escherichia coli':0.05,('B''s b':0.2,C:0.3):0.05);"
+    )
+
+
+def test_missing_outgroup():
+    with pytest.raises(ValueError):
+        rooted("(A:0.1,B:0.2,C:0.3);", "2173")
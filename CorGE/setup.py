@@ -15,7 +15,7 @@ setuptools.setup(
             "CorGE=CorGE.command:main",
         ],
     },
-    install_requires=["tqdm", "wget", "pyhmmer"],
+    install_requires=["tqdm", "wget", "pyhmmer", "numpy"],
     classifiers=[
         "Intended Audience :: Science/Research",
         "License :: OSI Approved :: GNU General Public License v2 or later (GPLv2+)",
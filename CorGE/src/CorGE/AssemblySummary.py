@@ -0,0 +1,159 @@
+import csv
+import logging
+import os
+import sqlite3
+
+
+class AssemblySummary:
+    """SQLite index of the columns CorGE uses from assembly_summary.txt
+    Built once next to the summary file and rebuilt whenever the summary changes"""
+
+    COLUMNS = [
+        "assembly_accession",
+        "species_taxid",
+        "refseq_category",
+        "ftp_path",
+        "organism_name",
+        "infraspecific_name",
+    ]
+    VERSION = 1
+
+    def __init__(self, assembly_summary_fp: str, db_fp: str = None) -> None:
+        self.assembly_summary_fp = assembly_summary_fp
+        self.db_fp = (
+            db_fp if db_fp else f"{os.path.splitext(assembly_summary_fp)[0]}.sqlite"
+        )
+
+        self.conn = self.__connect()
+
+    def select(
+        self, species: list = [], accs: list = [], all_species: bool = False
+    ) -> list:
+        """Returns (accession, taxon id, url) in file order for the first representative
+        of each of species (or of every taxon id if all_species) and for each of accs"""
+        self.__load("species", species)
+        self.__load("accessions", accs)
+        species_filter = "" if all_species else "AND species_taxid IN temp.species "
+        return self.conn.execute(
+            "SELECT assembly_accession, species_taxid, ftp_path FROM assemblies "
+            "WHERE ftp_path IS NOT NULL AND (rowid IN (SELECT MIN(rowid) FROM assemblies "
+            f"WHERE refseq_category != 'na' AND ftp_path IS NOT NULL {species_filter}"
+            "GROUP BY species_taxid) OR assembly_accession IN temp.accessions) "
+            "ORDER BY rowid"
+        ).fetchall()
+
+    def accessions_for_species(self, species: list) -> list:
+        """Returns (accession, taxon id, url) for the first representative of each taxon id"""
+        return self.select(species=species)
+
+    def species_for_accessions(self, accs: list) -> list:
+        """Returns (accession, taxon id, url) for each of accs that's in the summary"""
+        return self.select(accs=accs)
+
+    def all_species(self) -> list:
+        """Returns (accession, taxon id, url) for the first representative of every taxon id"""
+        return self.select(all_species=True)
+
+    def names(self, accs: list, column: str) -> dict:
+        """Returns a map from each of accs that's in the summary to its value in column"""
+        if column not in self.COLUMNS:
+            raise ValueError(f"{column} isn't indexed from {self.assembly_summary_fp}")
+        self.__load("accessions", accs)
+        return dict(
+            self.conn.execute(
+                f"SELECT assembly_accession, {column} FROM assemblies "
+                "WHERE assembly_accession IN temp.accessions "
+                f"AND {column} IS NOT NULL ORDER BY rowid"
+            ).fetchall()
+        )
+
+    def close(self):
+        self.conn.close()
+
+    ### Private Methods
+
+    def __load(self, table: str, values: list):
+        """Replaces the contents of a temp lookup table, duplicates are dropped"""
+        self.conn.execute(f"DELETE FROM temp.{table}")
+        self.conn.executemany(
+            f"INSERT OR IGNORE INTO temp.{table} VALUES (?)",
+            ((str(v),) for v in values),
+        )
+
+    def __connect(self) -> sqlite3.Connection:
+        stat = os.stat(self.assembly_summary_fp)
+        source = (stat.st_size, stat.st_mtime_ns, self.VERSION)
+        if self.__stored_source() == source or self.__build(source):
+            conn = sqlite3.connect(self.db_fp, check_same_thread=False)
+        else:
+            logging.warning(f"Indexing {self.assembly_summary_fp} in memory instead")
+            conn = sqlite3.connect(":memory:", check_same_thread=False)
+            self.__fill(conn, source)
+        for table in ["species", "accessions"]:
+            conn.execute(f"CREATE TEMP TABLE {table} (value TEXT PRIMARY KEY)")
+        return conn
+
+    def __stored_source(self) -> tuple:
+        if not os.path.exists(self.db_fp):
+            return None
+        try:
+            conn = sqlite3.connect(self.db_fp)
+            try:
+                return conn.execute(
+                    "SELECT size, mtime_ns, version FROM source"
+                ).fetchone()
+            finally:
+                conn.close()
+        except sqlite3.Error:
+            return None  # Missing, partial or corrupt index
+
+    def __build(self, source: tuple) -> bool:
+        """Writes the index to a temporary file and moves it into place"""
+        logging.info(f"Indexing {self.assembly_summary_fp}")
+        tmp_fp = f"{self.db_fp}.{os.getpid()}.tmp"
+        try:
+            conn = sqlite3.connect(tmp_fp)
+            try:
+                self.__fill(conn, source)
+            finally:
+                conn.close()
+            os.replace(tmp_fp, self.db_fp)
+            return True
+        except (OSError, sqlite3.Error) as e:
+            logging.warning(f"Couldn't write {self.db_fp}: {e}")
+            if os.path.exists(tmp_fp):
+                os.remove(tmp_fp)
+            return False
+
+    def __fill(self, conn: sqlite3.Connection, source: tuple):
+        conn.execute(
+            f"CREATE TABLE assemblies ({', '.join(f'{c} TEXT' for c in self.COLUMNS)})"
+        )
+        conn.execute("CREATE TABLE source (size INTEGER, mtime_ns INTEGER, version)")
+        with open(self.assembly_summary_fp) as f:
+            reader = csv.reader(f, dialect=csv.excel_tab)
+            next(reader)  # First row is a comment
+            headers = next(reader)  # This row has the headers
+            headers[0] = headers[0][
+                2:
+            ]  # Remove the "# " from the beginning of the first element
+
+            indices = [headers.index(c) for c in self.COLUMNS]
+
+            def rows():
+                for line in reader:
+                    # Incomplete assembly_summary entries are missing trailing fields
+                    yield tuple(line[i] if i < len(line) else None for i in indices)
+
+            conn.executemany(
+                f"INSERT INTO assemblies VALUES ({', '.join('?' * len(indices))})",
+                rows(),
+            )
+        conn.execute(
+            "CREATE INDEX assemblies_accession ON assemblies (assembly_accession)"
+        )
+        conn.execute(
+            "CREATE INDEX assemblies_species ON assemblies (species_taxid, refseq_category)"
+        )
+        conn.execute("INSERT INTO source VALUES (?, ?, ?)", source)
+        conn.commit()
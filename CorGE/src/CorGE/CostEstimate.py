@@ -0,0 +1,272 @@
+import concurrent.futures
+import json
+import logging
+import os
+import pyhmmer.easel
+import time
+from .Downloader import Downloader, DownloadError
+from .Genome import AccessionGenome, LocalGenome
+from .ProfileSet import ProfileSet
+
+
+class CostEstimate:
+    """Projects what collecting and extracting genomes will cost before doing it: bytes to
+    download, disk used and hmmsearch CPU time, calibrated on a sample of real genomes
+    Download sizes come from HEAD requests and are cached in output/genome-sizes.json"""
+
+    EXTS = [".faa", ".fna"]
+    # Uncompressed over gzipped size of RefSeq files, used until some are on disk
+    RATIOS = {".faa": 1.9, ".fna": 3.4}
+    # Gzipped size of a typical RefSeq bacterial genome's files, if none can be sized
+    TYPICAL_SIZES = {".faa": 1000000, ".fna": 1300000}
+
+    def __init__(
+        self,
+        output_fp: str,
+        threads: int = 1,
+        sample: int = 3,
+        max_requests: int = 200,
+        downloader: Downloader = None,
+        profiles: ProfileSet = None,
+    ) -> None:
+        self.output_fp = output_fp
+        self.threads = max(1, threads)
+        self.sample = sample
+        self.max_requests = max_requests
+        self.downloader = downloader if downloader else Downloader(retries=1)
+        self.sizes_fp = os.path.join(self.output_fp, "genome-sizes.json")
+        self.sizes = self.__read_sizes()
+        # Calibrated on, fetched from NCBI's SCCG set when first needed if not given
+        self.profiles = profiles
+
+    def collection(self, genomes: list, genomes_fp: str, decompress: bool) -> dict:
+        """Estimates the download, disk use and search time of collecting genomes"""
+        ratios = self.ratios(genomes_fp)
+        present = [g for g in genomes if g.is_downloaded(genomes_fp, True, True)]
+        missing = [
+            (g, ext)
+            for g in genomes
+            for ext in self.EXTS
+            if not g.find_file(genomes_fp, ext)
+        ]
+        sizes = self.__download_sizes(
+            [(g, ext) for g, ext in missing if isinstance(g, AccessionGenome)]
+        )
+
+        download = disk = 0
+        for g, ext in missing:
+            if isinstance(g, AccessionGenome):
+                download += sizes[(g.get_name(), ext)]
+                disk += sizes[(g.get_name(), ext)] * (ratios[ext] if decompress else 1)
+            else:
+                disk += os.path.getsize(g.find_file(g.fp, ext))
+
+        # Everything collected gets searched, whether it's already here or not
+        protein_bytes = 0
+        for g in genomes:
+            fp = g.find_file(genomes_fp, ".faa")
+            if fp:
+                protein_bytes += self.uncompressed_size(fp)
+            elif isinstance(g, AccessionGenome):
+                protein_bytes += sizes[(g.get_name(), ".faa")] * ratios[".faa"]
+            else:
+                protein_bytes += self.uncompressed_size(g.find_file(g.fp, ".faa"))
+
+        estimate = {
+            "genomes": len(genomes),
+            "present": len(present),
+            "download_bytes": int(download),
+            "disk_bytes": int(disk),
+            **self.__search(protein_bytes, self.__sample_fps(genomes, genomes_fp)),
+        }
+        logging.info(
+            f"Collecting {len(genomes)} genomes ({len(present)} already present) "
+            f"downloads ~{self.human(download)} and uses ~{self.human(disk)} of disk"
+        )
+        self.__log_search(estimate)
+        return estimate
+
+    def extraction(self, prot_fps: list, profiles: ProfileSet = None) -> dict:
+        """Estimates the search time of filtering SCCGs from prot_fps"""
+        if profiles:
+            self.profiles = profiles
+        estimate = {
+            "genomes": len(prot_fps),
+            **self.__search(
+                sum(self.uncompressed_size(fp) for fp in prot_fps),
+                prot_fps[:: max(1, len(prot_fps) // self.sample)][: self.sample],
+            ),
+        }
+        self.__log_search(estimate)
+        return estimate
+
+    def calibrate(self, prot_fps: list) -> float:
+        """Returns hmmsearch CPU seconds per uncompressed byte of protein FASTA"""
+        profiles = self.__profiles()
+        cpu_s = size = 0
+        for fp in prot_fps:
+            with pyhmmer.easel.SequenceFile(fp, digital=True) as seqs_file:
+                proteins = seqs_file.read_block()
+            start = time.process_time()
+            for _ in profiles.search(proteins):
+                pass
+            cpu_s += time.process_time() - start
+            size += self.uncompressed_size(fp)
+        return cpu_s / size if size else 0.0
+
+    def ratios(self, genomes_fp: str) -> dict:
+        """Returns the uncompressed over gzipped size of the .gz genome files in genomes_fp
+        for each extension, or typical RefSeq ratios where there aren't any"""
+        ratios = dict(self.RATIOS)
+        if not os.path.exists(genomes_fp):
+            return ratios
+        for ext in self.EXTS:
+            fps = [
+                os.path.join(genomes_fp, fp)
+                for fp in os.listdir(genomes_fp)
+                if fp[-7:] == f"{ext}.gz"
+            ]
+            gz_size = sum(os.path.getsize(fp) for fp in fps)
+            if gz_size:
+                ratios[ext] = sum(self.uncompressed_size(fp) for fp in fps) / gz_size
+        return ratios
+
+    @staticmethod
+    def uncompressed_size(fp: str) -> int:
+        """Returns a file's size, read from the gzip trailer for .gz files (modulo 4GB)"""
+        if fp[-3:] != ".gz":
+            return os.path.getsize(fp)
+        with open(fp, "rb") as f:
+            f.seek(-4, os.SEEK_END)
+            return int.from_bytes(f.read(4), "little")
+
+    @staticmethod
+    def human(size: float) -> str:
+        for unit in ["B", "KB", "MB", "GB"]:
+            if size < 1000:
+                return f"{size:.1f}{unit}"
+            size /= 1000
+        return f"{size:.1f}TB"
+
+    ### Private Methods
+
+    def __download_sizes(self, files: list) -> dict:
+        """Maps each (genome name, ext) to its download size, HEAD requesting up to
+        max_requests uncached files spread over the list and extrapolating the rest"""
+        urls = {(g.get_name(), ext): g.file_url(ext) for g, ext in files}
+        uncached = [key for key, url in urls.items() if url not in self.sizes]
+        step = max(1, -(-len(uncached) // self.max_requests))
+        requested = uncached[::step][: self.max_requests]
+        if requested:
+            logging.info(
+                f"Sizing {len(requested)} of {len(uncached)} uncached files..."
+            )
+            try:
+                with concurrent.futures.ThreadPoolExecutor(self.threads) as executor:
+                    futures = {
+                        executor.submit(self.__content_length, urls[key]): key
+                        for key in requested
+                    }
+                    for future in concurrent.futures.as_completed(futures):
+                        size = future.result()
+                        if size is not None:
+                            self.sizes[urls[futures[future]]] = size
+            finally:
+                self.downloader.close_all()
+            self.__write_sizes()
+
+        sizes = {key: self.sizes[url] for key, url in urls.items() if url in self.sizes}
+        for ext in self.EXTS:
+            known = [size for (_, e), size in sizes.items() if e == ext]
+            mean = sum(known) / len(known) if known else self.TYPICAL_SIZES[ext]
+            unknown = [key for key in urls if key[1] == ext and key not in sizes]
+            if unknown:
+                logging.info(
+                    f"Estimating {len(unknown)} {ext} files at ~{self.human(mean)} each "
+                    f"from {len(known) if known else 'no'} sized ones"
+                )
+            sizes.update({key: mean for key in unknown})
+        return sizes
+
+    def __content_length(self, url: str) -> int:
+        try:
+            return self.downloader.content_length(url)
+        except DownloadError as e:
+            logging.debug(f"Couldn't size {url}: {e}")
+            return None
+
+    def __sample_fps(self, genomes: list, genomes_fp: str) -> list:
+        """Returns up to sample protein files to calibrate on, fetching some
+        into output/dryrun-sample/ if none are on disk yet"""
+        fps = [g.find_file(genomes_fp, ".faa") for g in genomes]
+        fps += [
+            g.find_file(g.fp, ".faa") for g in genomes if isinstance(g, LocalGenome)
+        ]
+        fps = [fp for fp in fps if fp]
+        if fps:
+            return fps[:: max(1, len(fps) // self.sample)][: self.sample]
+
+        sample_fp = os.path.join(self.output_fp, "dryrun-sample")
+        os.makedirs(sample_fp, exist_ok=True)
+        accs = [g for g in genomes if isinstance(g, AccessionGenome)]
+        for g in accs[:: max(1, len(accs) // self.sample)][: self.sample]:
+            fp = os.path.join(sample_fp, f"{g.get_name()}.faa.gz")
+            try:
+                if not os.path.exists(fp):
+                    self.downloader.download(g.file_url(".faa"), fp)
+                fps.append(fp)
+            except DownloadError as e:
+                logging.warning(f"Couldn't fetch {g.get_name()} to calibrate on: {e}")
+        self.downloader.close_all()
+        return fps
+
+    def __search(self, protein_bytes: float, sample_fps: list) -> dict:
+        if not sample_fps:
+            logging.warning(
+                "No genomes to calibrate hmmsearch on, skipping its estimate"
+            )
+            return {"protein_bytes": int(protein_bytes), "cpu_hours": None}
+        logging.info(f"Calibrating hmmsearch on {len(sample_fps)} genomes...")
+        rate = self.calibrate(sample_fps)
+        cpu_hours = rate * protein_bytes / 3600
+        return {
+            "protein_bytes": int(protein_bytes),
+            "cpu_s_per_mb": round(rate * 1e6, 3),
+            "cpu_hours": round(cpu_hours, 3),
+            "wall_hours": round(cpu_hours / self.threads, 3),
+        }
+
+    def __log_search(self, estimate: dict):
+        if estimate["cpu_hours"] is not None:
+            logging.info(
+                f"Searching {self.human(estimate['protein_bytes'])} of proteins takes "
+                f"~{estimate['cpu_hours']} CPU hours (~{estimate['wall_hours']} hours "
+                f"at --threads {self.threads})"
+            )
+
+    def __profiles(self) -> ProfileSet:
+        if not self.profiles:
+            hmm_fp = os.path.join(self.output_fp, "genes.hmm.gz")
+            if not os.path.exists(hmm_fp):
+                import wget  # Only needed the first time
+
+                hmm_fp = wget.download(ProfileSet.SCCG_URL, out=self.output_fp)
+            # Read straight from the .hmm.gz, an estimate shouldn't hmmpress anything
+            self.profiles = ProfileSet(hmm_fp, press=False)
+        return self.profiles
+
+    def __read_sizes(self) -> dict:
+        if not os.path.exists(self.sizes_fp):
+            return {}
+        try:
+            with open(self.sizes_fp) as f:
+                return json.load(f)
+        except ValueError:
+            logging.warning(f"Ignoring unreadable {self.sizes_fp}")
+            return {}
+
+    def __write_sizes(self):
+        tmp_fp = f"{self.sizes_fp}.tmp"
+        with open(tmp_fp, "w") as f:
+            json.dump(self.sizes, f)
+        os.replace(tmp_fp, self.sizes_fp)
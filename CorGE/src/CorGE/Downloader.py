@@ -0,0 +1,232 @@
+import hashlib
+import http.client
+import logging
+import os
+import threading
+import time
+from urllib.parse import urljoin, urlsplit
+
+
+class DownloadError(Exception):
+    pass
+
+
+class MissingFileError(DownloadError):
+    pass
+
+
+class Downloader:
+    """Fetches files over HTTP(S) with one persistent connection per host and thread
+    Failed transfers are retried with exponential backoff and resumed where they stopped
+    """
+
+    def __init__(
+        self,
+        retries: int = 5,
+        backoff: float = 1.0,
+        timeout: float = 60.0,
+        chunk_size: int = 1 << 20,
+    ) -> None:
+        self.retries = retries
+        self.backoff = backoff
+        self.timeout = timeout
+        self.chunk_size = chunk_size
+        # (thread, scheme, host) -> connection, shared so close_all can reach every thread's
+        self.connections = {}
+        self.lock = threading.Lock()
+
+    def download(self, url: str, dest_fp: str, md5: str = None) -> str:
+        """Downloads url to dest_fp, verifying it against md5 if given, and returns dest_fp
+        Data goes to dest_fp.part first so an interrupted download can be resumed"""
+        part_fp = f"{dest_fp}.part"
+
+        def attempt():
+            self.__fetch(url, part_fp)
+            if md5 and self.md5sum(part_fp) != md5:
+                os.remove(part_fp)
+                raise DownloadError(f"Checksum mismatch for {url}")
+            os.replace(part_fp, dest_fp)
+            return dest_fp
+
+        return self.__retry(url, attempt)
+
+    def get_text(self, url: str) -> str:
+        """Returns the body of a small text file, e.g. md5checksums.txt"""
+
+        def attempt():
+            status, body = self.__request("GET", url)
+            if status == 404:
+                raise MissingFileError(f"HTTP 404 for {url}")
+            if status != 200:
+                raise DownloadError(f"HTTP {status} for {url}")
+            return body.decode()
+
+        return self.__retry(url, attempt)
+
+    def content_length(self, url: str) -> int:
+        """Returns the size of url from a HEAD request, None if the server doesn't say"""
+
+        def attempt():
+            scheme, host, resp = self.__open("HEAD", url)
+            resp.read()
+            if resp.getheader("Connection", "").lower() == "close":
+                self.__drop_connection(scheme, host)
+            if resp.status == 404:
+                raise MissingFileError(f"HTTP 404 for {url}")
+            if resp.status != 200:
+                raise DownloadError(f"HTTP {resp.status} for {url}")
+            length = resp.getheader("Content-Length")
+            return int(length) if length is not None else None
+
+        return self.__retry(url, attempt)
+
+    def md5_checksums(self, dir_url: str) -> dict:
+        """Returns a filename -> md5 map from an NCBI assembly directory's md5checksums.txt"""
+        try:
+            text = self.get_text(f"{dir_url}/md5checksums.txt")
+        except DownloadError as e:
+            logging.warning(f"No checksums for {dir_url}, skipping verification ({e})")
+            return {}
+        checksums = {}
+        for line in text.splitlines():
+            try:
+                md5, fp = line.split()
+                checksums[fp.split("/")[-1]] = md5
+            except ValueError:
+                pass  # Blank or malformed line
+        return checksums
+
+    def close(self):
+        """Closes this thread's open connections"""
+        thread = threading.get_ident()
+        with self.lock:
+            keys = [k for k in self.connections if k[0] == thread]
+            conns = [self.connections.pop(k) for k in keys]
+        for conn in conns:
+            conn.close()
+
+    def close_all(self):
+        """Closes the open connections of every thread, once they're done downloading"""
+        with self.lock:
+            conns = list(self.connections.values())
+            self.connections = {}
+        for conn in conns:
+            conn.close()
+
+    @staticmethod
+    def md5sum(fp: str) -> str:
+        h = hashlib.md5()
+        with open(fp, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+        return h.hexdigest()
+
+    ### Private Methods
+
+    def __retry(self, url: str, attempt):
+        for i in range(self.retries + 1):
+            try:
+                return attempt()
+            except MissingFileError:
+                raise
+            except (OSError, http.client.HTTPException, DownloadError) as e:
+                if i == self.retries:
+                    raise DownloadError(
+                        f"Giving up on {url} after {i + 1} attempts: {e}"
+                    ) from e
+                wait = self.backoff * 2**i
+                logging.warning(f"Retrying {url} in {wait:.1f}s ({e})")
+                time.sleep(wait)
+
+    def __connection(self, scheme: str, host: str) -> http.client.HTTPConnection:
+        key = (threading.get_ident(), scheme, host)
+        with self.lock:
+            if key not in self.connections:
+                if scheme == "https":
+                    conn = http.client.HTTPSConnection(host, timeout=self.timeout)
+                else:
+                    conn = http.client.HTTPConnection(host, timeout=self.timeout)
+                self.connections[key] = conn
+            return self.connections[key]
+
+    def __drop_connection(self, scheme: str, host: str):
+        with self.lock:
+            conn = self.connections.pop((threading.get_ident(), scheme, host), None)
+        if conn:
+            conn.close()
+
+    def __open(self, method: str, url: str, headers: dict = None):
+        """Sends a request on a persistent connection, following redirects
+        Returns the scheme, host and response, whose body must be read before reuse"""
+        for _ in range(10):
+            parts = urlsplit(url)
+            # NCBI's ftp:// paths are served over https as well
+            scheme = "https" if parts.scheme in ["https", "ftp"] else "http"
+            path = parts.path + (f"?{parts.query}" if parts.query else "")
+            try:
+                resp = self.__send(scheme, parts.netloc, method, path, headers)
+            except (http.client.RemoteDisconnected, ConnectionError):
+                # The server dropped an idle keep-alive connection, reconnect once
+                self.__drop_connection(scheme, parts.netloc)
+                resp = self.__send(scheme, parts.netloc, method, path, headers)
+            if resp.status in [301, 302, 303, 307, 308]:
+                resp.read()
+                url = urljoin(url, resp.getheader("Location"))
+                continue
+            return scheme, parts.netloc, resp
+        raise DownloadError(f"Too many redirects for {url}")
+
+    def __send(
+        self, scheme: str, host: str, method: str, path: str, headers: dict
+    ) -> http.client.HTTPResponse:
+        conn = self.__connection(scheme, host)
+        try:
+            conn.request(method, path, headers=headers if headers else {})
+            return conn.getresponse()
+        except (OSError, http.client.HTTPException):
+            self.__drop_connection(scheme, host)
+            raise
+
+    def __request(self, method: str, url: str) -> tuple:
+        scheme, host, resp = self.__open(method, url)
+        try:
+            body = resp.read()
+        except (OSError, http.client.HTTPException):
+            self.__drop_connection(scheme, host)
+            raise
+        if resp.getheader("Connection", "").lower() == "close":
+            self.__drop_connection(scheme, host)
+        return resp.status, body
+
+    def __fetch(self, url: str, part_fp: str):
+        """Streams url into part_fp, resuming from its current size if it exists"""
+        have = os.path.getsize(part_fp) if os.path.exists(part_fp) else 0
+        headers = {"Range": f"bytes={have}-"} if have else {}
+        scheme, host, resp = self.__open("GET", url, headers)
+
+        try:
+            if resp.status == 404:
+                resp.read()
+                raise MissingFileError(f"HTTP 404 for {url}")
+            if resp.status == 416:  # Partial file is already complete
+                resp.read()
+                return
+            if resp.status not in [200, 206]:
+                resp.read()
+                raise DownloadError(f"HTTP {resp.status} for {url}")
+
+            with open(part_fp, "ab" if resp.status == 206 else "wb") as f:
+                for chunk in iter(lambda: resp.read(self.chunk_size), b""):
+                    f.write(chunk)
+        except (OSError, http.client.HTTPException):
+            self.__drop_connection(scheme, host)
+            raise
+
+        length = resp.getheader("Content-Length")
+        if length is not None:
+            expected = int(length) + (have if resp.status == 206 else 0)
+            if os.path.getsize(part_fp) != expected:
+                self.__drop_connection(scheme, host)
+                raise DownloadError(f"Incomplete transfer of {url}")
+        if resp.getheader("Connection", "").lower() == "close":
+            self.__drop_connection(scheme, host)
@@ -0,0 +1,194 @@
+import collections
+import gzip
+import logging
+import os
+
+FaiEntry = collections.namedtuple(
+    "FaiEntry", ["name", "length", "offset", "linebases", "linewidth"]
+)
+
+
+class FastaIndex:
+    """samtools faidx style index of where each record's sequence starts in a FASTA file
+    Records are matched on their exact ID (the first word of the header)
+    Gzipped files are indexed by uncompressed offset and read in one forward stream"""
+
+    def __init__(self, fasta_fp: str, index_fp: str = None) -> None:
+        self.fasta_fp = fasta_fp
+        self.index_fp = index_fp if index_fp else f"{fasta_fp}.fai"
+
+        if self.__is_current():
+            self.entries = self.__read_index()
+        else:
+            self.entries = self.__build_index()
+            if self.entries is not None:
+                self.__write_index()
+
+    def __len__(self) -> int:
+        return len(self.entries) if self.entries is not None else 0
+
+    def __contains__(self, name: str) -> bool:
+        return self.entries is not None and name in self.entries
+
+    def names(self) -> list:
+        """Returns all record IDs in file order"""
+        return list(self.entries.keys()) if self.entries is not None else []
+
+    def fetch(self, names: list, key=None) -> dict:
+        """Pulls all the named records out of the FASTA file in a single forward pass
+        If key is given, names are matched against key(record ID) as well as the record ID
+        Returns a dict mapping each name found to a (header, sequence) tuple"""
+        if self.entries is None:
+            return self.__scan(names, key)
+
+        lookup = {}
+        if key:
+            for record_id in self.entries:
+                k = key(record_id)
+                if k:
+                    lookup.setdefault(k, record_id)
+        wanted = {}
+        for name in names:
+            if name in self.entries:
+                wanted[name] = name
+            elif name in lookup:
+                wanted[name] = lookup[name]
+            else:
+                logging.debug(f"Didn't find {name} in {self.fasta_fp}")
+
+        order = list(self.entries.keys())
+        positions = {record_id: i for i, record_id in enumerate(order)}
+        records = {}
+        with self.__open("rb") as f:
+            for name, record_id in sorted(
+                wanted.items(), key=lambda t: self.entries[t[1]].offset
+            ):
+                entry = self.entries[record_id]
+                i = positions[record_id]
+                f.seek(self.__sequence_end(self.entries[order[i - 1]]) if i else 0)
+                header = f.readline()
+                while header and header[:1] != b">":
+                    header = f.readline()
+                f.seek(entry.offset)
+                seq = f.read(self.__sequence_bytes(entry))
+                records[name] = (
+                    header[1:].rstrip(b"\r\n").decode(),
+                    seq.replace(b"\n", b"").replace(b"\r", b"").decode(),
+                )
+
+        return records
+
+    ### Private Methods
+
+    def __open(self, mode: str):
+        if self.fasta_fp[-3:] == ".gz":
+            return gzip.open(self.fasta_fp, mode)
+        return open(self.fasta_fp, mode)
+
+    def __is_current(self) -> bool:
+        return os.path.exists(self.index_fp) and os.path.getmtime(
+            self.index_fp
+        ) >= os.path.getmtime(self.fasta_fp)
+
+    def __read_index(self) -> dict:
+        entries = collections.OrderedDict()
+        with open(self.index_fp) as f:
+            for line in f:
+                fields = line.rstrip("\r\n").split("\t")
+                entries[fields[0]] = FaiEntry(fields[0], *map(int, fields[1:5]))
+        return entries
+
+    def __build_index(self) -> dict:
+        """Returns the index entries or None if the file can't be indexed
+        (lines within a record have to be the same length, like for samtools faidx)"""
+        entries = collections.OrderedDict()
+        name = None
+        length = offset = linebases = linewidth = 0
+        last_line_short = False
+        pos = 0
+        with self.__open("rb") as f:
+            for line in f:
+                if line[:1] == b">":
+                    if name is not None:
+                        entries[name] = FaiEntry(
+                            name, length, offset, linebases, linewidth
+                        )
+                    name = line[1:].split()[0].decode() if line[1:].split() else ""
+                    length = linebases = linewidth = 0
+                    last_line_short = False
+                    offset = pos + len(line)
+                elif name is not None:
+                    bases = len(line.rstrip(b"\r\n"))
+                    if last_line_short and bases > 0:
+                        return self.__unindexable(name)
+                    if linebases == 0:
+                        if bases == 0:
+                            return self.__unindexable(name)
+                        linebases = bases
+                        linewidth = len(line)
+                    elif bases > linebases:
+                        return self.__unindexable(name)
+                    elif bases < linebases:
+                        last_line_short = True
+                    length += bases
+                pos += len(line)
+            if name is not None:
+                entries[name] = FaiEntry(name, length, offset, linebases, linewidth)
+
+        return entries
+
+    def __unindexable(self, name: str):
+        logging.warning(
+            f"Inconsistent line lengths in {name}, can't index {self.fasta_fp}"
+        )
+        return None
+
+    def __write_index(self):
+        try:
+            os.makedirs(os.path.dirname(os.path.abspath(self.index_fp)), exist_ok=True)
+            with open(self.index_fp, "w") as f:
+                for e in self.entries.values():
+                    f.write(
+                        f"{e.name}\t{e.length}\t{e.offset}\t{e.linebases}\t{e.linewidth}\n"
+                    )
+        except OSError as e:
+            logging.warning(f"Couldn't write index {self.index_fp}: {e}")
+
+    def __scan(self, names: list, key=None) -> dict:
+        """Fallback for files that can't be indexed, one pass over the whole file"""
+        wanted = set(names)
+        records = {}
+        name = None
+        header = ""
+        seq = []
+
+        def add():
+            if name is None:
+                return
+            for k in [name, key(name) if key else None]:
+                if k in wanted and k not in records:
+                    records[k] = (header, "".join(seq))
+
+        with self.__open("rt") as f:
+            for line in f:
+                if line[:1] == ">":
+                    add()
+                    header = line[1:].rstrip("\r\n")
+                    name = header.split()[0] if header.split() else ""
+                    seq = []
+                else:
+                    seq.append(line.strip())
+            add()
+
+        return records
+
+    @staticmethod
+    def __sequence_bytes(entry: FaiEntry) -> int:
+        if entry.length == 0:
+            return 0
+        lines = -(-entry.length // entry.linebases)
+        return entry.length + lines * (entry.linewidth - entry.linebases)
+
+    @staticmethod
+    def __sequence_end(entry: FaiEntry) -> int:
+        return entry.offset + FastaIndex.__sequence_bytes(entry)
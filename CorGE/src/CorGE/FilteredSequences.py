@@ -0,0 +1,119 @@
+import collections
+import os
+
+
+class FilteredSequences:
+    """Directory of the SCCG hits filtered from each genome
+    The split layout writes one {cog}__{genome}{ext} file per hit, the packed layout
+    one {genome}{ext} file per genome whose headers start with the cog
+    Both layouts are read, so a directory can be resumed with either one"""
+
+    LAYOUTS = ["split", "packed"]
+
+    def __init__(self, fp: str, ext: str, layout: str = "split") -> None:
+        if layout not in self.LAYOUTS:
+            raise ValueError(f"Unknown filtered sequences layout {layout}")
+        self.fp = fp
+        self.ext = ext
+        self.layout = layout
+
+    def write(self, name: str, records: list):
+        """Writes all of one genome's (cog, header, sequence) hits
+        The last hit for a cog wins, like overwriting its file in the split layout"""
+        if self.layout == "packed":
+            last = {cog: (cog, header, seq) for cog, header, seq in records}
+            with open(self.__packed_fp(name), "w") as f:
+                for cog, header, seq in last.values():
+                    f.write(f">{cog} {header}\n{seq}\n")
+        else:
+            for cog, header, seq in records:
+                with open(self.__split_fp(cog, name), "w") as f:
+                    f.write(f">{header}\n{seq}\n")
+
+    def read(self):
+        """Yields each genome's name and list of (cog, header, sequence) hits"""
+        for name, fns in sorted(self.__files().items()):
+            records = []
+            for fn in fns:
+                if "__" in fn:
+                    cog = fn.split("__")[0]
+                    records += [
+                        (cog, header, seq)
+                        for header, seq in self.__read_fasta(os.path.join(self.fp, fn))
+                    ]
+                else:
+                    for header, seq in self.__read_fasta(os.path.join(self.fp, fn)):
+                        cog, _, header = header.partition(" ")
+                        records.append((cog, header, seq))
+            yield name, records
+
+    def records(self):
+        """Yields every (cog, genome, header, sequence) hit without holding them all
+        Split layout files come grouped by cog, packed ones genome by genome"""
+        files = self.__files()
+        split = sorted(
+            (fn.split("__")[0], name, fn)
+            for name, fns in files.items()
+            for fn in fns
+            if "__" in fn
+        )
+        for cog, name, fn in split:
+            for header, seq in self.__read_fasta(os.path.join(self.fp, fn)):
+                yield cog, name, header, seq
+        for name, fns in sorted(files.items()):
+            for fn in [fn for fn in fns if "__" not in fn]:
+                for header, seq in self.__read_fasta(os.path.join(self.fp, fn)):
+                    cog, _, header = header.partition(" ")
+                    yield cog, name, header, seq
+
+    def names(self) -> list:
+        """Returns the names of all genomes with hits"""
+        return sorted(self.__files().keys())
+
+    def remove(self, name: str, cogs: list):
+        """Removes a genome's hits for cogs in either layout"""
+        for fp in [self.__packed_fp(name)] + [self.__split_fp(c, name) for c in cogs]:
+            try:
+                os.remove(fp)
+            except FileNotFoundError:
+                pass
+
+    ### Private Methods
+
+    def __files(self) -> dict:
+        """Maps each genome name to its files, from one directory listing"""
+        files = collections.defaultdict(list)
+        for fn in os.listdir(self.fp):
+            if fn[0] == "." or fn[-len(self.ext) :] != self.ext:
+                continue
+            stem = fn[: -len(self.ext)]
+            # {cog}__{genome} for split files, {genome} for packed ones
+            files[stem.split("__")[1] if "__" in stem else stem].append(fn)
+        for fns in files.values():
+            fns.sort()
+        return files
+
+    def __packed_fp(self, name: str) -> str:
+        return os.path.join(self.fp, f"{name}{self.ext}")
+
+    def __split_fp(self, cog: str, name: str) -> str:
+        return os.path.join(self.fp, f"{cog}__{name}{self.ext}")
+
+    @staticmethod
+    def __read_fasta(fp: str) -> list:
+        """Returns (header, sequence) for each record, joining wrapped sequence lines"""
+        records = []
+        header = None
+        seq = []
+        with open(fp) as f:
+            for line in f:
+                if line[:1] == ">":
+                    if header is not None:
+                        records.append((header, "".join(seq)))
+                    header = line[1:].rstrip("\r\n")
+                    seq = []
+                else:
+                    seq.append(line.strip())
+        if header is not None:
+            records.append((header, "".join(seq)))
+        return records
@@ -1,16 +1,30 @@
 import collections
-import csv
+import concurrent.futures
 import gzip
+import hashlib
+import io
+import json
 import logging
 import os
-import pyhmmer.plan7
 import pyhmmer.easel
+import tempfile
+import threading
+import time
 import tqdm
-import wget
-from io import TextIOWrapper
+from .AssemblySummary import AssemblySummary
+from .CostEstimate import CostEstimate
+from .FastaIndex import FastaIndex
+from .FilteredSequences import FilteredSequences
+from .HitTable import HitTable
+from .IncrementalMerge import IncrementalMerge
+from .ProfileSet import ProfileSet
+from .RunManifest import RunManifest
+from .RunReport import RunReport
 
 
 class GeneCollection:
+    MAX_OPEN_MERGED = 256
+
     def __init__(
         self,
         genomes: str = os.path.join(os.getcwd(), "output/", "genomes/"),
@@ -18,6 +32,14 @@ class GeneCollection:
         file_type: str = "prot",
         name_type: str = "tx_id",
         outgroup: str = "2173",
+        press_hmms: bool = True,
+        threads: int = 1,
+        layout: str = "split",
+        incremental: bool = False,
+        report: RunReport = None,
+        min_score: float = 0.0,
+        max_evalue: float = None,
+        ties: str = "drop",
     ) -> None:
         self.genomes = genomes
         if self.genomes[-1] != "/":
@@ -28,121 +50,150 @@ class GeneCollection:
         self.file_type = file_type
         self.name_type = name_type
         self.outgroup = outgroup
+        self.incremental = incremental
+        self.min_score = min_score
+        self.max_evalue = max_evalue
+        if ties not in HitTable.TIES:
+            raise ValueError(f"Unknown tie rule {ties}")
+        self.ties = ties
+        self.report = report if report else RunReport()
 
         self.filtered_fp = os.path.join(self.output, "filtered-sequences/")
         self.merged_fp = os.path.join(self.output, "merged-sequences/")
-        if not os.path.exists(self.filtered_fp):
-            logging.info("Making filtered sequences directory.")
-            os.makedirs(self.filtered_fp)
-        if not os.path.exists(self.merged_fp):
-            logging.info("Making merged sequences directory.")
-            os.makedirs(self.merged_fp)
+        self.merged_manifest_fp = os.path.join(self.output, "merged-sequences.json")
+        self.manifest = RunManifest(os.path.join(self.filtered_fp, ".manifest"))
+        self.hits_fp = os.path.join(self.output, "hit-tables/")
+        self.filtered = FilteredSequences(self.filtered_fp, ".faa", layout)
 
         self.filtered_nucl_fp = os.path.join(self.output, "filtered-nucl-sequences/")
-        if self.file_type == "nucl":
-            if not os.path.exists(self.filtered_nucl_fp):
-                logging.info("Making filtered nucleotide sequences directory.")
-                os.makedirs(self.filtered_nucl_fp)
+        self.filtered_nucl = FilteredSequences(self.filtered_nucl_fp, ".fna", layout)
+        self.nucl_manifest = RunManifest(
+            os.path.join(self.filtered_nucl_fp, ".manifest")
+        )
 
+        self.index_fp = os.path.join(self.output, "genome-indices/")
         self.config_fp = os.path.join(self.output, "config.yml")
         self.assembly_summary_fp = os.path.join(
             "/".join(self.genomes.split("/")[:-2]), "assembly_summary.txt"
         )
 
         self.hmm_fp = os.path.join(self.output, "genes.hmm.gz")
+        self.press_hmms = press_hmms
+        self.profiles = None
+        self.threads = max(1, threads)
+        self.thread_local = threading.local()
+
+    def dryrun(self) -> dict:
+        """Logs the genomes left to filter and the estimated hmmsearch time for them
+        Nothing is written, the output directory is left as it was"""
+        prot_fps, reselect_fps = self.__pending(self.__prot_fps())
+        logging.info(f"Genomes to be filtered (total: {len(prot_fps)})")
+        if reselect_fps:
+            logging.info(
+                f"Genomes to be reselected from their hit tables (total: {len(reselect_fps)})"
+            )
+        if not prot_fps:
+            return {"genomes": 0}
+        profiles = self.profiles
+        if not profiles and os.path.exists(self.hmm_fp):
+            # Calibrating from the .hmm.gz leaves no pressed .h3* files behind
+            profiles = ProfileSet(self.hmm_fp, press=False)
+        elif not profiles:
+            with tempfile.TemporaryDirectory() as tmp_fp:
+                import wget  # Only needed the first time
+
+                profiles = ProfileSet(
+                    wget.download(ProfileSet.SCCG_URL, out=tmp_fp), press=False
+                )
+        return CostEstimate(self.output, self.threads).extraction(prot_fps, profiles)
 
     def filter_prot(self):
         """Filters SCCGs from protein files"""
-        prot_fps = [fp for fp in os.listdir(self.genomes) if fp[-4:] == ".faa"]
-        prot_fps = self.__no_repeat_filter(prot_fps, self.filtered_fp)
-        prot_fps = [os.path.join(self.genomes, fp) for fp in prot_fps]
+        self.__make_dirs()
+        prot_fps, reselect_fps = self.__no_repeat_filter(self.__prot_fps())
         logging.debug(f"Filtering: {prot_fps}")
 
-        logging.info("Filtering sequences...")
-        with tqdm.tqdm(total=len(prot_fps)) as pbar:
-            for prot_fp in prot_fps:
-                pbar.update(1)
-                with pyhmmer.easel.SequenceFile(prot_fp, digital=True) as seqs_file:
-                    proteins = list(seqs_file)
-
-                results = self.__run_hmmscan(proteins)
-
-                name = prot_fp.split("/")[-1].split(".faa")[0]
+        # Already searched with other cutoffs or tie rule, only the selection is redone
+        for prot_fp in reselect_fps:
+            self.__reselect_genome(self.__genome_name(prot_fp), prot_fp)
 
-                for result in results:
-                    with open(
-                        os.path.join(self.filtered_fp, f"{result.cog}__{name}.faa"), "w"
-                    ) as f:
-                        with open(prot_fp) as g:
-                            self.__write_sequence(f, g, result.query)
+        if not prot_fps:
+            return
+        if not self.profiles:
+            self.profiles = self.__load_profiles()
 
-                logging.info(f"Filtered {name}, top bitscores:")
-                for result in results[:10]:
-                    logging.info(
-                        f"{result.query}\t{'{:.1f}'.format(result.bitscore)}\t{result.cog}"
-                    )
-                with open(os.path.join(self.filtered_fp, f".done_{name}"), "w") as f:
-                    f.write("")
+        logging.info("Filtering sequences...")
+        with tqdm.tqdm(total=len(prot_fps)) as pbar:
+            if self.threads == 1:
+                for prot_fp in prot_fps:
+                    self.__filter_genome(prot_fp, self.profiles)
+                    pbar.update(1)
+            else:
+                with concurrent.futures.ThreadPoolExecutor(self.threads) as executor:
+                    futures = [
+                        executor.submit(self.__filter_genome, prot_fp)
+                        for prot_fp in prot_fps
+                    ]
+                    for future in concurrent.futures.as_completed(futures):
+                        future.result()
+                        pbar.update(1)
+
+    def reselect(self):
+        """Reselects SCCGs from each genome's saved hit table with the current cutoffs
+        and tie rule, the chosen proteins are read back out of the genome file"""
+        self.__make_dirs()
+        prot_fps = self.__genome_fps(".faa")
+        names = sorted(fp[:-4] for fp in os.listdir(self.hits_fp) if fp[-4:] == ".npz")
+        logging.info(f"Reselecting sequences from {len(names)} hit tables...")
+        for name in names:
+            if name not in prot_fps:
+                logging.warning(f"No protein file for {name}, skipping...")
+                continue
+            self.__reselect_genome(name, prot_fps[name])
 
     def filter_nucl(self):
         """Filters SCCGs from nucleotide files, only runs if file_type is nucl"""
         if self.file_type == "nucl":
-            nucl_fps = [
-                os.path.join(self.genomes, fp)
-                for fp in os.listdir(self.genomes)
-                if fp[-4:] == ".fna"
-            ]
-
-            for fp in os.listdir(self.filtered_fp):
-                try:
-                    cog = fp.split("__")[0]
-                    acc = fp.split("__")[1].split(".faa")[0]
-                    matching_nucl_fp = [
-                        fp for fp in nucl_fps if fp.split("/")[-1][:-4] == acc
-                    ][0]
-
-                    query = ""
-                    with open(os.path.join(self.filtered_fp, fp)) as f:
-                        query = f.readline().strip()[1:].split(" ")[0]
-
-                    with open(
-                        os.path.join(self.filtered_nucl_fp, f"{cog}__{acc}.fna"), "w"
-                    ) as f:
-                        with open(matching_nucl_fp) as g:
-                            self.__write_sequence(f, g, query)
-                except IndexError:
-                    logging.debug(
-                        f"File {fp} doesn't meet naming standards, skipping..."
-                    )
+            self.__make_dirs()
+            nucl_fps = self.__genome_fps(".fna")
+
+            genomes = (
+                (acc, hits, nucl_fps[acc])
+                for acc, hits in self.filtered.read()
+                if self.__has_nucl(acc, nucl_fps)
+                and self.__nucl_outdated(acc, hits, nucl_fps[acc])
+            )
+            if self.threads == 1:
+                for genome in genomes:
+                    self.__filter_nucl_genome(*genome)
+            else:
+                with concurrent.futures.ThreadPoolExecutor(self.threads) as executor:
+                    futures = set()
+                    for genome in genomes:
+                        # Bounded so only a few genomes' hits are held at once
+                        if len(futures) >= 4 * self.threads:
+                            done, futures = concurrent.futures.wait(
+                                futures, return_when=concurrent.futures.FIRST_COMPLETED
+                            )
+                            for future in done:
+                                future.result()
+                        futures.add(executor.submit(self.__filter_nucl_genome, *genome))
+                    for future in concurrent.futures.as_completed(futures):
+                        future.result()
 
     def merge(self):
-        """Merges filtered sequences into per-SCCG files"""
-        if len(os.listdir(self.merged_fp)) > 0:
-            logging.warning(f"Found existing files in {self.merged_fp}, overwriting...")
-            for fp in os.listdir(self.merged_fp):
-                try:
-                    os.remove(os.path.join(self.merged_fp, fp))
-                except FileNotFoundError as e:
-                    logging.debug(
-                        f"While removing {os.path.join(self.merged_fp, fp)}: {e}"
-                    )
+        """Merges filtered sequences into per-SCCG files
+        Existing files are only replaced if their contents change, so their mtimes
+        only tell the workflow about genes that actually need rerunning"""
+        self.__make_dirs()
+        for fp in os.listdir(self.merged_fp):
+            if fp[-4:] == ".tmp":  # Left by an interrupted merge
+                os.remove(os.path.join(self.merged_fp, fp))
 
-        all_filtered_seqs = list()
-        if self.file_type == "prot":
-            all_filtered_seqs = [
-                os.path.join(self.filtered_fp, fp)
-                for fp in os.listdir(self.filtered_fp)
-                if fp[0] != "."
-            ]
-        else:
-            all_filtered_seqs = [
-                os.path.join(self.filtered_nucl_fp, fp)
-                for fp in os.listdir(self.filtered_nucl_fp)
-                if fp[0] != "."
-            ]
+        filtered = self.filtered if self.file_type == "prot" else self.filtered_nucl
 
         names = self.__get_names_map(
-            all_filtered_seqs, self.name_type, self.assembly_summary_fp
+            filtered.names(), self.name_type, self.assembly_summary_fp
         )
         if self.outgroup not in names.values():
             logging.error(
@@ -151,15 +202,20 @@ class GeneCollection:
             if self.outgroup in names.keys():
                 logging.info(f"Did you mean {names[self.outgroup]}?")
 
-        for fp in all_filtered_seqs:
-            seq = fp.split("/")[-1]
-            name = seq.split("__")[1][:-4]
-            cog = seq.split("__")[0]
-            new_name = names[name]
-            with open(fp) as f:
-                with open(os.path.join(self.merged_fp, f"{cog}.fasta"), "a") as g:
-                    g.write(f"> {new_name}\n")
-                    g.write(f.readlines()[1])
+        writers = collections.OrderedDict()
+        cogs = set()
+        try:
+            for cog, name, _, seq in filtered.records():
+                self.__merged_writer(writers, cog).write(f"> {names[name]}\n{seq}\n")
+                cogs.add(cog)
+        finally:
+            for writer in writers.values():
+                writer.close()
+
+        self.__replace_merged(cogs)
+
+        if self.incremental:
+            IncrementalMerge(self.output).update(self.merged_fp, sorted(cogs))
 
     def write_config(self):
         """Writes a config file for the snakemake pipeline"""
@@ -177,132 +233,384 @@ class GeneCollection:
         cfg += f"# File type contained in merged-sequences (prot or nucl)\nTYPE: {self.file_type}\n"
 
         cfg += "# Method to build tree (supermat or genetree)\nALG: supermat\n"
+        cfg += "# Tree engine (raxml, or fasttree for quicker approximate trees of many taxa)\nTREE_ENGINE: raxml\n"
 
         cfg += f"# Directory to look for output data in\nDATA: {self.output}\n"
 
         cfg += "# Number of basepairs to use from each gene when creating a supermatrix\nBPS: 100\n"
+        cfg += "# Also write per-column alignment stats next to each reduced alignment\nSTATS: false\n"
+        cfg += "# Reduce all genes' alignments in one job instead of one job per gene\nBATCH: false\n"
+        cfg += "# Add new sequences to the last alignments and trees (set by extract_genes --incremental)\n"
+        cfg += f"INCREMENTAL: {'true' if self.incremental else 'false'}\n"
+
+        cfg += "# Jobs get a thread per CELLS_PER_THREAD alignment cells (taxa x length), up to MAX_THREADS\n"
+        cfg += "MAX_THREADS: 8\nCELLS_PER_THREAD: 500000\n"
+        cfg += "# and MIN_MEM_MB plus MEM_MB_PER_MCELL per million cells of memory\n"
+        cfg += "MIN_MEM_MB: 1000\nMEM_MB_PER_MCELL: 2000\n"
 
         with open(self.config_fp, "w") as f:
             f.write(cfg)
 
-    # From pyhmmer docs https://pyhmmer.readthedocs.io/en/stable/examples/fetchmgs.html
-    def __run_hmmscan(self, proteins: list) -> list:
-        ### Example from pyhmmer docs
-        ### Only uses ~40 SCCGs
-        # url = "https://github.com/motu-tool/fetchMGs/raw/master/lib/MG_BitScoreCutoffs.allhits.txt"
-
-        # cutoffs = {}
-        # with urllib.request.urlopen(url) as f:
-        #    for line in csv.reader(TextIOWrapper(f), dialect="excel-tab"):
-        #        if not line[0].startswith("#"):
-        #            cutoffs[line[0]] = float(line[1])
-
-        # baseurl = "https://github.com/motu-tool/fetchMGs/raw/master/lib/{}.hmm"
-
-        # hmms = []
-        # for cog in cutoffs:
-        #    with urllib.request.urlopen(baseurl.format(cog)) as f:
-        #        hmm = next(pyhmmer.plan7.HMMFile(f))
-        #        cutoff = cutoffs[hmm.name.decode()]
-        #        hmm.cutoffs.trusted = (cutoff, cutoff)
-        #        hmms.append(hmm)
-        ### End example
-
-        baseurl = "https://github.com/merenlab/anvio/raw/master/anvio/data/hmm/Bacteria_71/genes.hmm.gz"
-        # https://www.ebi.ac.uk/interpro/download/pfam/
-
-        hmms = []
-        if not os.path.exists(self.hmm_fp):
-            self.hmm_fp = wget.download(baseurl, out=self.output)
-        with gzip.open(self.hmm_fp) as f:
-            hmm_set = pyhmmer.plan7.HMMFile(f)
-            i = 0
-            while i < 71:
-                hmms.append(next(hmm_set))
-                i += 1
-
-        Result = collections.namedtuple("Result", ["query", "cog", "bitscore"])
-
-        results = []
-        for top_hits in pyhmmer.hmmsearch(hmms, proteins, bit_cutoffs="trusted"):
-            for hit in top_hits:
-                cog = hit.best_domain.alignment.hmm_name.decode()
-                results.append(Result(hit.name.decode(), cog, hit.score))
-
-        best_results = {}
-        keep_query = set()
-        for result in results:
-            if result.query in best_results:
-                previous_bitscore = best_results[result.query].bitscore
-                if result.bitscore > previous_bitscore:
-                    best_results[result.query] = result
-                    keep_query.add(result.query)
-                elif result.bitscore == previous_bitscore:
-                    if best_results[result.query].cog != hit.cog:
-                        keep_query.remove(result.query)
+    def __filter_genome(self, prot_fp: str, profiles: ProfileSet = None):
+        """Filters SCCGs from one protein file and marks it done, safe to run in worker threads"""
+        if not profiles:
+            profiles = self.__thread_profiles()
+
+        start = time.perf_counter()
+        # The file is read once, for both the search and the manifest's checksum
+        with open(prot_fp, "rb") as f:
+            data = f.read()
+        sha256 = hashlib.sha256(data).hexdigest()
+        if prot_fp[-3:] == ".gz":
+            data = gzip.decompress(data)
+        with pyhmmer.easel.SequenceFile(io.BytesIO(data), digital=True) as seqs_file:
+            proteins = seqs_file.read_block()
+        del data
+        read = time.perf_counter()
+
+        # From pyhmmer docs https://pyhmmer.readthedocs.io/en/stable/examples/fetchmgs.html
+        table = HitTable.from_top_hits(profiles.search(proteins))
+        searched = time.perf_counter()
+
+        name = self.__genome_name(prot_fp)
+        if self.manifest.is_started(name):
+            # Clean up an interrupted or outdated run without listing filtered_fp
+            self.filtered.remove(
+                name, set(profiles.names()) | set(self.manifest.hits(name))
+            )
+        self.manifest.start(name)
+        table.save(self.__hits_table_fp(name))
+        results = table.select(**self.__selection())
+
+        # Hits are written from the sequences already in memory, not by rereading prot_fp
+        proteins_map = {protein.name.decode(): protein for protein in proteins}
+        self.filtered.write(
+            name,
+            [
+                (
+                    result.cog,
+                    self.__header(proteins_map[result.query]),
+                    proteins_map[result.query].textize().sequence,
+                )
+                for result in results
+            ],
+        )
+
+        logging.info(f"Filtered {name}, top bitscores:")
+        for result in sorted(results, key=lambda r: -r.bitscore)[:10]:
+            logging.info(
+                f"{result.query}\t{'{:.1f}'.format(result.bitscore)}\t{result.cog}"
+            )
+        self.manifest.done(
+            name,
+            prot_fp,
+            [result.cog for result in results],
+            self.__selection(),
+            sha256,
+        )
+        self.report.genome(
+            name,
+            "filter_prot",
+            proteins=len(proteins),
+            hits=len(table),
+            selected=len(results),
+            read_s=read - start,
+            hmmsearch_s=searched - read,
+            extract_s=time.perf_counter() - searched,
+        )
+
+    def __reselect_genome(self, name: str, prot_fp: str):
+        """Selects a genome's SCCGs again from its saved hit table, reading the chosen
+        proteins back out of prot_fp"""
+        results = HitTable.load(self.__hits_table_fp(name)).select(**self.__selection())
+        proteins = self.__index(prot_fp).fetch([r.query for r in results])
+
+        self.filtered.remove(
+            name, set(r.cog for r in results) | set(self.manifest.hits(name))
+        )
+        self.manifest.start(name)
+        self.filtered.write(
+            name,
+            [
+                (result.cog, *proteins[result.query])
+                for result in results
+                if result.query in proteins
+            ],
+        )
+        self.manifest.done(name, prot_fp, [r.cog for r in results], self.__selection())
+
+    def __selection(self) -> dict:
+        """Returns the current cutoffs and tie rule, as recorded in the manifest"""
+        return {
+            "min_score": self.min_score,
+            "max_evalue": self.max_evalue,
+            "ties": self.ties,
+        }
+
+    def __merged_writer(self, writers: collections.OrderedDict, cog: str):
+        """Returns an open, buffered writer for cog's merged file
+        At most MAX_OPEN_MERGED are kept open, least recently used ones are closed first
+        """
+        if cog in writers:
+            writers.move_to_end(cog)
+            return writers[cog]
+        if len(writers) >= self.MAX_OPEN_MERGED:
+            writers.popitem(last=False)[1].close()
+        writers[cog] = open(self.__merged_tmp_fp(cog), "a", buffering=1 << 16)
+        return writers[cog]
+
+    def __merged_tmp_fp(self, cog: str) -> str:
+        return os.path.join(self.merged_fp, f".{cog}.fasta.tmp")
+
+    def __replace_merged(self, cogs: set):
+        """Moves each newly merged file into place unless it matches the existing one,
+        removes files for genes no longer merged and records each file's sha256"""
+        manifest = {}
+        if os.path.exists(self.merged_manifest_fp):
+            with open(self.merged_manifest_fp) as f:
+                try:
+                    manifest = json.load(f)
+                except ValueError:
+                    logging.warning(
+                        f"Couldn't read {self.merged_manifest_fp}, rehashing"
+                    )
+
+        hashes = {}
+        replaced = []
+        for cog in sorted(cogs):
+            fp = os.path.join(self.merged_fp, f"{cog}.fasta")
+            hashes[cog] = RunManifest.sha256(self.__merged_tmp_fp(cog))
+            if self.__merged_hash(fp, manifest.get(cog)) == hashes[cog]:
+                os.remove(self.__merged_tmp_fp(cog))
             else:
-                best_results[result.query] = result
-                keep_query.add(result.query)
+                os.replace(self.__merged_tmp_fp(cog), fp)
+                replaced.append(cog)
+        for fp in os.listdir(self.merged_fp):
+            if fp[: -len(".fasta")] not in cogs:
+                logging.info(f"Removing {fp}, it's no longer merged")
+                os.remove(os.path.join(self.merged_fp, fp))
+        logging.info(f"Merged {len(cogs)} genes, {len(replaced)} changed")
+        logging.debug(f"Changed genes: {replaced}")
+
+        entries = {}
+        for cog, sha256 in hashes.items():
+            stat = os.stat(os.path.join(self.merged_fp, f"{cog}.fasta"))
+            entries[cog] = {
+                "sha256": sha256,
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+            }
+        with open(f"{self.merged_manifest_fp}.tmp", "w") as f:
+            json.dump(entries, f, indent=1)
+        os.replace(f"{self.merged_manifest_fp}.tmp", self.merged_manifest_fp)
+
+    def __merged_hash(self, fp: str, entry: dict) -> str:
+        """Returns the sha256 of an existing merged file, from the manifest if it's current"""
+        if not os.path.exists(fp):
+            return None
+        stat = os.stat(fp)
+        if (
+            entry
+            and entry.get("size") == stat.st_size
+            and entry.get("mtime_ns") == stat.st_mtime_ns
+        ):
+            return entry.get("sha256")
+        return RunManifest.sha256(fp)
+
+    def __filter_nucl_genome(self, acc: str, hits: list, nucl_fp: str):
+        """Pulls the CDS records for all of a genome's protein hits in one indexed pass"""
+        # Queries are the protein IDs, the first word of each header
+        start = time.perf_counter()
+        queries = [(cog, header.split(" ")[0]) for cog, header, _ in hits]
+        if self.nucl_manifest.is_started(acc):
+            # Clear the last run's hits, some genes may not be hit anymore
+            self.filtered_nucl.remove(
+                acc,
+                set(cog for cog, _ in queries)
+                | set(hit.split(" ")[0] for hit in self.nucl_manifest.hits(acc)),
+            )
+        self.nucl_manifest.start(acc)
+        index = self.__index(nucl_fp)
+        indexed = time.perf_counter()
+        records = index.fetch([query for _, query in queries], self.__cds_protein_id)
+        fetched = time.perf_counter()
+        found = []
+        for cog, query in queries:
+            if query not in records:
+                logging.warning(f"Didn't find {query} in {nucl_fp}, skipping...")
+                continue
+            found.append((cog, *records[query]))
+        self.filtered_nucl.write(acc, found)
+        self.nucl_manifest.done(
+            acc, nucl_fp, [f"{cog} {query}" for cog, query in queries]
+        )
+        self.report.genome(
+            acc,
+            "filter_nucl",
+            hits=len(found),
+            index_s=indexed - start,
+            fetch_s=fetched - indexed,
+            write_s=time.perf_counter() - fetched,
+        )
 
-        return [best_results[k] for k in sorted(best_results) if k in keep_query]
+    def __nucl_outdated(self, acc: str, hits: list, nucl_fp: str) -> bool:
+        """Tells whether a genome's CDS records need pulling again, because its protein
+        hits or nucleotide file changed since they last were"""
+        queries = sorted(f"{cog} {header.split(' ')[0]}" for cog, header, _ in hits)
+        if self.nucl_manifest.is_done(acc, nucl_fp) and (
+            self.nucl_manifest.hits(acc) == queries
+        ):
+            logging.debug(f"Skipping nucleotide filter step for {acc}, hits unchanged")
+            return False
+        return True
 
     @staticmethod
-    def __no_repeat_filter(prot_fps: list, filtered_fp: str) -> list:
+    def __has_nucl(acc: str, nucl_fps: dict) -> bool:
+        if acc not in nucl_fps:
+            logging.debug(f"No nucleotide file for {acc}, skipping...")
+            return False
+        return True
+
+    def __hits_table_fp(self, name: str) -> str:
+        return os.path.join(self.hits_fp, f"{name}.npz")
+
+    def __index(self, fp: str) -> FastaIndex:
+        """Returns the offset index for a genome file, kept in output/genome-indices/"""
+        return FastaIndex(fp, os.path.join(self.index_fp, f"{fp.split('/')[-1]}.fai"))
+
+    def __thread_profiles(self) -> ProfileSet:
+        """Returns this worker thread's own copy of the profiles"""
+        # hmmsearch reconfigures optimized profiles in place so threads can't share them
+        if not hasattr(self.thread_local, "profiles"):
+            self.thread_local.profiles = self.profiles.copy()
+        return self.thread_local.profiles
+
+    def __load_profiles(self) -> ProfileSet:
+        """Fetches the SCCG profile HMMs if they're missing and loads them once for all genomes"""
+        if not os.path.exists(self.hmm_fp):
+            import wget  # Only needed the first time
+
+            self.hmm_fp = wget.download(ProfileSet.SCCG_URL, out=self.output)
+        return ProfileSet(self.hmm_fp, self.press_hmms)
+
+    def __prot_fps(self) -> list:
+        return list(self.__genome_fps(".faa").values())
+
+    def __genome_fps(self, ext: str) -> dict:
+        """Maps each genome name to its ext file, preferring plain over gzipped when
+        both exist as Genome.find_file does"""
+        fps = {}
+        # Sorted so X.faa comes before X.faa.gz and is the one kept
+        for fp in sorted(os.listdir(self.genomes)):
+            if self.__genome_ext(fp) == ext:
+                fps.setdefault(self.__genome_name(fp), os.path.join(self.genomes, fp))
+        return fps
+
+    def __make_dirs(self):
+        """Makes the output directories, on the first run that writes to them"""
+        fps = {
+            self.filtered_fp: "filtered sequences",
+            self.hits_fp: "hit tables",
+            self.merged_fp: "merged sequences",
+        }
+        if self.file_type == "nucl":
+            fps[self.filtered_nucl_fp] = "filtered nucleotide sequences"
+        for fp, description in fps.items():
+            if not os.path.exists(fp):
+                logging.info(f"Making {description} directory.")
+                os.makedirs(fp)
+
+    def __no_repeat_filter(self, prot_fps: list) -> tuple:
+        """Records genomes finished by older versions in the manifest, then returns
+        the genomes left to filter and to reselect as __pending does"""
+        for fp in prot_fps:
+            name = self.__genome_name(fp)
+            if self.__is_legacy(name):
+                self.manifest.add_legacy(name)
+        return self.__pending(prot_fps)
+
+    def __pending(self, prot_fps: list) -> tuple:
+        """Drops genomes the manifest says are already filtered from the same input,
+        returns the ones left to filter and the ones to reselect because they were
+        filtered with other cutoffs or tie rule (and have a saved hit table)
+        Only reads the manifest, so dry runs can use it"""
         filtered_prot_fps = []
+        reselect_prot_fps = []
         for fp in prot_fps:
-            existing_filtered_files = [
-                filtered_fp
-                for filtered_fp in os.listdir(filtered_fp)
-                if fp in filtered_fp
-            ]
-            l = len(existing_filtered_files)
-            if os.path.exists(os.path.join(filtered_fp, f".done_{fp[:-4]}")):
-                logging.info(
-                    f"Skipping protein filter step for {fp[:-4]} because all files already exist..."
-                )
-            elif l > 0 and not os.path.exists(
-                os.path.join(filtered_fp, ".done_fp[:-4]")
-            ):
+            name = self.__genome_name(fp)
+            if self.__is_legacy(name) or self.manifest.is_done(name, fp):
+                if self.__selection_matches(name):
+                    logging.info(
+                        f"Skipping protein filter step for {name} because all files already exist..."
+                    )
+                elif os.path.exists(self.__hits_table_fp(name)):
+                    logging.info(
+                        f"Reselecting {name} because it was filtered with other cutoffs..."
+                    )
+                    reselect_prot_fps.append(fp)
+                else:
+                    logging.warning(
+                        f"Found {name} filtered with other cutoffs and no hit table, overwriting..."
+                    )
+                    filtered_prot_fps.append(fp)
+            elif self.manifest.is_started(name):
                 logging.warning(
-                    f"Found partial protein filter files for {fp[:-4]}, overwriting..."
+                    f"Found partial or outdated protein filter files for {name}, overwriting..."
                 )
                 filtered_prot_fps.append(fp)
             else:
                 filtered_prot_fps.append(fp)
 
-        return filtered_prot_fps
+        return filtered_prot_fps, reselect_prot_fps
+
+    def __is_legacy(self, name: str) -> bool:
+        """Tells whether an older version finished name, leaving a .done_ marker"""
+        return not self.manifest.is_started(name) and os.path.exists(
+            os.path.join(self.filtered_fp, f".done_{name}")
+        )
+
+    def __selection_matches(self, name: str) -> bool:
+        """Tells whether name's hits were selected with the current settings, runs that
+        didn't record them used the defaults"""
+        selection = self.manifest.selection(name)
+        if selection is None:
+            selection = {"min_score": 0.0, "max_evalue": None, "ties": "drop"}
+        return selection == self.__selection()
 
     @staticmethod
-    def __write_sequence(
-        out: TextIOWrapper, seqs: TextIOWrapper, query: str, acc: str = None
-    ):
-        seq = ""
-        add = False
-        for l in seqs.readlines():
-            if add:
-                if l[0] != ">":
-                    seq += l.strip()
-                else:
-                    break
-            if query in l and l[0] == ">":
-                add = True
-                if acc:
-                    seq += f"> {acc}\n"
-                else:
-                    seq += f"{l.strip()}\n"
+    def __genome_ext(fp: str) -> str:
+        """Returns .faa or .fna for (optionally gzipped) genome files"""
+        fn = fp.split("/")[-1]
+        if fn[-3:] == ".gz":
+            fn = fn[:-3]
+        return fn[-4:]
 
-        out.write(seq + "\n")
+    @staticmethod
+    def __genome_name(fp: str) -> str:
+        """Returns the genome name of an (optionally gzipped) genome file"""
+        fn = fp.split("/")[-1]
+        if fn[-3:] == ".gz":
+            fn = fn[:-3]
+        return fn[:-4]
 
     @staticmethod
-    def __get_names_map(fps: list, nt: str, assembly_summary_fp: str) -> dict:
-        accs = {
-            fp.split("/")[-1]
-            .split("__")[1]
-            .split(".f")[0]: fp.split("/")[-1]
-            .split("__")[1]
-            .split(".f")[0]
-            for fp in fps
-        }
+    def __header(seq: pyhmmer.easel.Sequence) -> str:
+        """Rebuilds a FASTA header from an easel sequence's name and description"""
+        if seq.description:
+            return f"{seq.name.decode()} {seq.description.decode()}"
+        return seq.name.decode()
+
+    @staticmethod
+    def __cds_protein_id(record_id: str) -> str:
+        """Returns the protein accession embedded in an NCBI CDS record ID
+        (e.g. lcl|NC_004545.1_cds_WP_011091539.1_407 -> WP_011091539.1)"""
+        if "_cds_" not in record_id:
+            return None
+        return record_id.split("_cds_", 1)[1].rsplit("_", 1)[0]
+
+    @staticmethod
+    def __get_names_map(genomes: list, nt: str, assembly_summary_fp: str) -> dict:
+        accs = {name: name for name in genomes}
         header = ""
         if nt == "acc":
             logging.debug(f"Names map: {accs}")
@@ -313,26 +621,7 @@ class GeneCollection:
             header = "infraspecific_name"
         elif nt == "species":
             header = "organism_name"
-        accs_list = list(accs.keys())
-        ids = {}
-
-        with open(assembly_summary_fp) as f:
-            reader = csv.reader(f, dialect=csv.excel_tab)
-            next(reader)  # First row is a comment
-            headers = next(reader)  # This row has the headers
-            headers[0] = headers[0][
-                2:
-            ]  # Remove the "# " from the beginning of the first element
-
-            idIndex = headers.index(header)
-            accIndex = headers.index("assembly_accession")
-
-            for line in reader:
-                try:
-                    if line[accIndex] in accs_list:
-                        ids[line[accIndex]] = line[idIndex]
-                except IndexError:
-                    pass  # Incomplete assembly_summary entry
+        ids = AssemblySummary(assembly_summary_fp).names(list(accs.keys()), header)
 
         # Fill in names that didn't find a match
         for name in [name for name in accs.keys() if name not in ids.keys()]:
@@ -2,7 +2,7 @@ import gzip
 import logging
 import os
 import shutil
-import wget
+from .Downloader import Downloader, DownloadError
 
 
 class Genome:
@@ -13,65 +13,91 @@ class Genome:
         """Returns the genome's name"""
         return self.name
 
-    def download(self, output_fp: str):
+    def download(self, output_fp: str, downloader: Downloader = None):
         """Check that the file doesn't already exist then retrieves it
         Puts all files in output_fp/genomes/"""
         raise NotImplementedError
 
     def is_downloaded(self, genomes_fp: str, prot: bool, nucl: bool) -> bool:
-        if prot and nucl:
-            if os.path.exists(
-                os.path.join(genomes_fp, self.name + ".faa")
-            ) and os.path.exists(os.path.join(genomes_fp, self.name + ".fna")):
-                return True
-        elif prot:
-            if os.path.exists(os.path.join(genomes_fp, self.name + ".faa")):
-                return True
-        elif nucl:
-            if os.path.exists(os.path.join(genomes_fp, self.name + ".fna")):
-                return True
-        else:
+        """Tells whether the genome's files exist in genomes_fp, compressed or not"""
+        if not prot and not nucl:
+            return False
+        if prot and not self.find_file(genomes_fp, ".faa"):
+            return False
+        if nucl and not self.find_file(genomes_fp, ".fna"):
             return False
+        return True
+
+    def find_file(self, fp: str, ext: str) -> str:
+        """Returns the path to the genome's ext file in fp, preferring plain over gzipped"""
+        for candidate in [f"{self.name}{ext}", f"{self.name}{ext}.gz"]:
+            if os.path.exists(os.path.join(fp, candidate)):
+                return os.path.join(fp, candidate)
+        return ""
 
 
 class AccessionGenome(Genome):
-    def __init__(self, name: str, tx_id: str = None, url: str = None) -> None:
+    def __init__(
+        self, name: str, tx_id: str = None, url: str = None, decompress: bool = False
+    ) -> None:
         super().__init__(name)
         self.tx_id = tx_id
         self.partial_url = url
+        self.decompress = decompress
 
-    def download(self, output_fp: str):
+    def download(self, output_fp: str, downloader: Downloader = None):
         """Check that the file doesn't already exist then retrieves it
         Puts all files in output_fp/genomes/"""
         genomes_fp = os.path.join(output_fp, "genomes/")
+        if not downloader:
+            downloader = Downloader()
+        checksums = None
         if not self.is_downloaded(genomes_fp, True, False):
             logging.info(f"Downloading protein-encoded genome for {self.name}")
-            self.__download(genomes_fp, "_protein", ".faa")
+            checksums = downloader.md5_checksums(self.partial_url)
+            self.__download(genomes_fp, ".faa", downloader, checksums)
         else:
             logging.warning(f"Found {self.name} protein-encoded genome, skipping...")
         if not self.is_downloaded(genomes_fp, False, True):
             logging.info(f"Downloading nucleotide-encoded genome for {self.name}")
-            self.__download(genomes_fp, "_cds_from_genomic", ".fna")
+            if checksums is None:
+                checksums = downloader.md5_checksums(self.partial_url)
+            self.__download(genomes_fp, ".fna", downloader, checksums)
         else:
             logging.warning(f"Found {self.name} nucleotide-encoded genome, skipping...")
 
-    def __download(self, genomes_fp: str, name_str: str, ext: str):
-        filename = f"{self.partial_url.split('/')[-1]}{name_str}{ext}.gz"
-        url = f"{self.partial_url}/{filename}"
+    def file_url(self, ext: str) -> str:
+        """Returns the URL of the genome's gzipped ext (.faa or .fna) file"""
+        name_str = "_protein" if ext == ".faa" else "_cds_from_genomic"
+        return f"{self.partial_url}/{self.partial_url.split('/')[-1]}{name_str}{ext}.gz"
+
+    def __download(
+        self,
+        genomes_fp: str,
+        ext: str,
+        downloader: Downloader,
+        checksums: dict,
+    ):
+        url = self.file_url(ext)
+        filename = url.split("/")[-1]
+        gz_fp = os.path.join(genomes_fp, f"{self.name}{ext}.gz")
 
         try:
-            wget.download(url, out=genomes_fp)
-        except Exception as e:
+            downloader.download(url, gz_fp, checksums.get(filename))
+        except DownloadError as e:
             logging.error(str(e))
+            return
 
-        with gzip.open(os.path.join(genomes_fp, filename), "rb") as f_in:
-            with open(os.path.join(genomes_fp, f"{self.name}{ext}"), "wb") as f_out:
-                shutil.copyfileobj(f_in, f_out)
+        # Genomes are kept gzipped unless asked otherwise, CorGE reads either
+        if self.decompress:
+            with gzip.open(gz_fp, "rb") as f_in:
+                with open(os.path.join(genomes_fp, f"{self.name}{ext}"), "wb") as f_out:
+                    shutil.copyfileobj(f_in, f_out)
 
-        try:
-            os.remove(os.path.join(genomes_fp, filename))
-        except OSError as e:
-            logging.error(str(e))
+            try:
+                os.remove(gz_fp)
+            except OSError as e:
+                logging.error(str(e))
 
 
 class LocalGenome(Genome):
@@ -79,7 +105,7 @@ class LocalGenome(Genome):
         super().__init__(name)
         self.fp = fp
 
-    def download(self, output_fp: str):
+    def download(self, output_fp: str, downloader: Downloader = None):
         """Check that the file doesn't already exist then retrieves it
         Puts all files in output_fp/genomes/"""
         genomes_fp = os.path.join(output_fp, "genomes/")
@@ -95,7 +121,5 @@ class LocalGenome(Genome):
             logging.warning(f"Found {self.name} nucleotide-encoded genome, skipping...")
 
     def __move(self, genomes_fp: str, ext: str):
-        shutil.copyfile(
-            os.path.join(self.fp, f"{self.name}{ext}"),
-            os.path.join(genomes_fp, f"{self.name}{ext}"),
-        )
+        fp = self.find_file(self.fp, ext)
+        shutil.copyfile(fp, os.path.join(genomes_fp, os.path.basename(fp)))
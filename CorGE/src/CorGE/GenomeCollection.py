@@ -1,7 +1,9 @@
-import csv
+import concurrent.futures
 import logging
 import os
-import wget
+from urllib.parse import urlsplit
+from .AssemblySummary import AssemblySummary
+from .Downloader import Downloader
 from .Genome import AccessionGenome, LocalGenome
 
 
@@ -12,6 +14,10 @@ class GenomeCollection:
         ncbi_species: list = [],
         ncbi_accessions: list = [],
         local_fp: str = "",
+        decompress: bool = False,
+        threads: int = 1,
+        all_species: bool = False,
+        mirror: str = None,
     ) -> None:
         self.output_fp = output_fp
         if self.output_fp[-1] != "/":
@@ -23,20 +29,20 @@ class GenomeCollection:
         self.assembly_summary_fp = os.path.join(self.output_fp, "assembly_summary.txt")
         if not os.path.exists(self.assembly_summary_fp):
             self.__download_assembly_summary()
+        self.assembly_summary = AssemblySummary(self.assembly_summary_fp)
 
+        self.decompress = decompress
+        self.threads = max(1, threads)
+        self.mirror = mirror
         self.local_fp = (
             local_fp if os.path.isabs(local_fp) else os.path.join(os.getcwd(), local_fp)
         )
 
         self.genomes = list()
-        for vals in self.__accessions_for_species(
-            ncbi_species, self.assembly_summary_fp
+        for vals in self.assembly_summary.select(
+            ncbi_species, ncbi_accessions, all_species
         ):
-            self.genomes.append(AccessionGenome(*vals))
-        for vals in self.__species_for_accessions(
-            ncbi_accessions, self.assembly_summary_fp
-        ):
-            self.genomes.append(AccessionGenome(*vals))
+            self.genomes.append(self.__accession_genome(*vals))
         for l in self.__list_valid_genomes(self.local_fp):
             self.genomes.append(LocalGenome(l, self.local_fp))
 
@@ -66,42 +72,52 @@ class GenomeCollection:
 
     def all_species(self):
         """Adds one representative of every species to genomes list"""
-        ids = []
-        with open(self.assembly_summary_fp) as f:
-            reader = csv.reader(f, dialect=csv.excel_tab)
-            next(reader)  # First row is a comment
-            headers = next(reader)  # This row has the headers
-            headers[0] = headers[0][
-                2:
-            ]  # Remove the "# " from the beginning of the first element
-
-            idIndex = headers.index("species_taxid")
-            accIndex = headers.index("assembly_accession")
-            refSeqIndex = headers.index("refseq_category")
-            urlIndex = headers.index("ftp_path")
-
-            for line in reader:
-                try:
-                    if int(line[idIndex]) not in ids and line[refSeqIndex] != "na":
-                        ids.append(int(line[idIndex]))
-                        self.genomes.append(
-                            AccessionGenome(
-                                line[accIndex], line[idIndex], line[urlIndex]
-                            )
-                        )
-                except IndexError:
-                    pass  # Incomplete assembly_summary entry
+        names = set(g.get_name() for g in self.genomes)
+        for vals in self.assembly_summary.all_species():
+            if vals[0] not in names:
+                self.genomes.append(self.__accession_genome(*vals))
+
+    def estimate(self) -> dict:
+        """Logs and returns the estimated download size, disk use and hmmsearch time of
+        collecting all Genome objects in genomes"""
+        # Only dry runs need pyhmmer here, so it isn't imported with the module
+        from .CostEstimate import CostEstimate
+
+        return CostEstimate(self.output_fp, self.threads).collection(
+            self.genomes, self.genomes_fp, self.decompress
+        )
 
     def collect(self):
         """Downloads or copies all Genome objects in genomes to output_fp"""
-        for g in self.genomes:
-            g.download(self.output_fp)
+        downloader = Downloader()
+        try:
+            if self.threads == 1:
+                for g in self.genomes:
+                    g.download(self.output_fp, downloader)
+            else:
+                with concurrent.futures.ThreadPoolExecutor(self.threads) as executor:
+                    futures = [
+                        executor.submit(g.download, self.output_fp, downloader)
+                        for g in self.genomes
+                    ]
+                    for future in concurrent.futures.as_completed(futures):
+                        future.result()
+        finally:
+            downloader.close_all()
 
     ### Private Methods
 
+    def __accession_genome(self, acc: str, tx_id: str, url: str) -> AccessionGenome:
+        """Makes an AccessionGenome, fetched from mirror instead of NCBI if it's set"""
+        if self.mirror:
+            url = f"{self.mirror.rstrip('/')}{urlsplit(url).path}"
+        return AccessionGenome(acc, tx_id, url, self.decompress)
+
     def __download_assembly_summary(self):
         """Downloads assembly_summary.txt to output_fp"""
         logging.info("assembly_summary.txt not found, fetching...")
+        import wget  # Only needed the first time
+
         wget.download(
             "https://ftp.ncbi.nlm.nih.gov/genomes/refseq/bacteria/assembly_summary.txt",
             out=self.output_fp,
@@ -112,77 +128,30 @@ class GenomeCollection:
                 "GCF_000016525.1\tPRJNA224116\tSAMN02604313\t\trepresentative genome\t420247\t2173\tMethanobrevibacter smithii ATCC 35061\tstrain=ATCC 35061; PS; DSMZ 861\t\tlatest\tComplete Genome\tMajor\tFull\t2007/06/04\tASM1652v1\tWashington University Center for Genome Sciences\tGCA_000016525.1\tidentical\thttps://ftp.ncbi.nlm.nih.gov/genomes/all/GCF/000/016/525/GCF_000016525.1_ASM1652v1\t\tassembly from type material\tna"
             )
 
-    @staticmethod
-    def __accessions_for_species(species: list, assembly_summary: str) -> list:
-        """Return list of one accession for each taxon id"""
-        ret = list()
-        tmp_species = species
-        with open(assembly_summary) as f:
-            reader = csv.reader(f, dialect=csv.excel_tab)
-            next(reader)  # First row is a comment
-            headers = next(reader)  # This row has the headers
-            headers[0] = headers[0][
-                2:
-            ]  # Remove the "# " from the beginning of the first element
-
-            idIndex = headers.index("species_taxid")
-            accIndex = headers.index("assembly_accession")
-            refSeqIndex = headers.index("refseq_category")
-            urlIndex = headers.index("ftp_path")
-
-            for line in reader:
-                try:
-                    if line[idIndex] in tmp_species and line[refSeqIndex] != "na":
-                        ret.append((line[accIndex], line[idIndex], line[urlIndex]))
-                        tmp_species.remove(line[idIndex])
-                except IndexError:
-                    pass  # Incomplete assembly_summary entry
-
-        return ret
-
-    @staticmethod
-    def __species_for_accessions(accs: list, assembly_summary: str) -> list:
-        """Return list of one taxon id for each accession"""
-        ret = list()
-        with open(assembly_summary) as f:
-            reader = csv.reader(f, dialect=csv.excel_tab)
-            next(reader)  # First row is a comment
-            headers = next(reader)  # This row has the headers
-            headers[0] = headers[0][
-                2:
-            ]  # Remove the "# " from the beginning of the first element
-
-            idIndex = headers.index("species_taxid")
-            accIndex = headers.index("assembly_accession")
-            urlIndex = headers.index("ftp_path")
-
-            for line in reader:
-                try:
-                    if line[accIndex] in accs:
-                        ret.append((line[accIndex], line[idIndex], line[urlIndex]))
-                except IndexError:
-                    pass  # Incomplete assembly_summary entry
-
-        return ret
-
     @staticmethod
     def __list_valid_genomes(fp: str) -> list:
-        """Returns a list of filenames that have both .faa and .fna files in the given filepath"""
+        """Returns a list of filenames that have both .faa and .fna files (gzipped or not) in the given filepath"""
         if fp:
             if not os.path.exists(fp):
                 logging.warning(f"Path {fp} doesn't exist, skipping local genomes.")
                 return []
-            files = os.listdir(fp)
-            return [
-                f[:-4] for f in files if f[-4:] == ".fna" and f"{f[:-4]}.faa" in files
-            ]
+            files = [f[:-3] if f[-3:] == ".gz" else f for f in os.listdir(fp)]
+            return sorted(
+                set(
+                    f[:-4]
+                    for f in files
+                    if f[-4:] == ".fna" and f"{f[:-4]}.faa" in files
+                )
+            )
         return []
 
     @staticmethod
     def __is_protein_file(fp: str) -> bool:
         """Tells whether or not an input file is a protein file
         (relative path is assumed to be from output_fp/genomes/)"""
-        # TODO: Account for gzip files
-        if os.path.split(fp)[1][-4:] == ".faa":
+        fn = os.path.split(fp)[1]
+        if fn[-3:] == ".gz":
+            fn = fn[:-3]
+        if fn[-4:] == ".faa":
             return True
         return False
@@ -0,0 +1,110 @@
+import collections
+import numpy as np
+import os
+
+Hit = collections.namedtuple("Hit", ["query", "cog", "bitscore"])
+
+
+class HitTable:
+    """Every hmmsearch hit for one genome as columns, saved to an .npz file so genes
+    can be reselected with other cutoffs or tie rules without searching again
+    Coordinates are the best domain's envelope on the protein and span of the HMM"""
+
+    COLUMNS = [
+        "query",
+        "cog",
+        "score",
+        "evalue",
+        "env_from",
+        "env_to",
+        "hmm_from",
+        "hmm_to",
+    ]
+    TIES = ["drop", "first"]
+
+    def __init__(self, columns: dict) -> None:
+        self.columns = columns
+
+    def __len__(self) -> int:
+        return len(self.columns["query"])
+
+    @classmethod
+    def from_top_hits(cls, all_top_hits):
+        """Builds a table from the TopHits of each profile hmmsearch yields"""
+        rows = []
+        for top_hits in all_top_hits:
+            for hit in top_hits:
+                domain = hit.best_domain
+                rows.append(
+                    (
+                        hit.name.decode(),
+                        domain.alignment.hmm_name.decode(),
+                        hit.score,
+                        hit.evalue,
+                        domain.env_from,
+                        domain.env_to,
+                        domain.alignment.hmm_from,
+                        domain.alignment.hmm_to,
+                    )
+                )
+        values = list(zip(*rows)) if rows else [[]] * len(cls.COLUMNS)
+        return cls(
+            {
+                "query": np.array(values[0], dtype=str),
+                "cog": np.array(values[1], dtype=str),
+                "score": np.array(values[2], dtype=np.float32),
+                "evalue": np.array(values[3], dtype=np.float64),
+                **{
+                    c: np.array(v, dtype=np.int32)
+                    for c, v in zip(cls.COLUMNS[4:], values[4:])
+                },
+            }
+        )
+
+    @classmethod
+    def load(cls, fp: str):
+        with np.load(fp, allow_pickle=False) as data:
+            return cls({c: data[c] for c in cls.COLUMNS})
+
+    def save(self, fp: str):
+        """Writes the table to a temporary file and moves it into place"""
+        tmp_fp = f"{fp}.tmp"
+        with open(tmp_fp, "wb") as f:
+            np.savez(f, **self.columns)
+        os.replace(tmp_fp, fp)
+
+    def select(
+        self, min_score: float = 0.0, max_evalue: float = None, ties: str = "drop"
+    ) -> list:
+        """Returns the best Hit for each cog, sorted by cog
+        Each protein only counts for the cog it scores highest against, one scoring
+        equally for two cogs is dropped or kept for the first one depending on ties"""
+        if ties not in self.TIES:
+            raise ValueError(f"Unknown tie rule {ties}")
+        keep = self.columns["score"] >= min_score
+        if max_evalue is not None:
+            keep &= self.columns["evalue"] <= max_evalue
+        query = self.columns["query"][keep]
+        cog = self.columns["cog"][keep]
+        score = self.columns["score"][keep]
+
+        # Best cog for each protein, then a protein's runner up with the same score is a tie
+        order = np.lexsort((cog, -score, query))
+        query, cog, score = query[order], cog[order], score[order]
+        first = np.ones(len(query), dtype=bool)
+        first[1:] = query[1:] != query[:-1]
+        if ties == "drop":
+            tied = np.zeros(len(query), dtype=bool)
+            tied[:-1] = ~first[1:] & (score[1:] == score[:-1])
+            first &= ~tied
+        query, cog, score = query[first], cog[first], score[first]
+
+        # Best protein for each cog, ties go to the first protein ID
+        order = np.lexsort((query, -score, cog))
+        query, cog, score = query[order], cog[order], score[order]
+        first = np.ones(len(cog), dtype=bool)
+        first[1:] = cog[1:] != cog[:-1]
+        return [
+            Hit(str(q), str(c), float(s))
+            for q, c, s in zip(query[first], cog[first], score[first])
+        ]
@@ -0,0 +1,125 @@
+import collections
+import hashlib
+import logging
+import os
+import shutil
+
+
+class IncrementalMerge:
+    """Compares each merged gene against its last alignment so the workflow can add
+    just the new sequences to it, and places them on the last tree, instead of
+    realigning and rebuilding everything
+    A gene qualifies when every aligned sequence is still merged unchanged"""
+
+    def __init__(self, output: str) -> None:
+        self.output = output
+        self.aligned_fp = os.path.join(output, "aligned-sequences")
+        self.trees_fp = os.path.join(output, "trees")
+        self.added_fp = os.path.join(output, "added-sequences")
+        self.previous_fp = os.path.join(output, "previous")
+
+    def update(self, merged_fp: str, genes: list) -> dict:
+        """Writes added-sequences/{gene}.fasta with the sequences new to each qualifying
+        gene and keeps copies of its alignment and tree in previous/
+        Returns the number of sequences added to each qualifying gene"""
+        os.makedirs(self.added_fp, exist_ok=True)
+        os.makedirs(os.path.join(self.previous_fp, "aligned-sequences"), exist_ok=True)
+        os.makedirs(os.path.join(self.previous_fp, "trees"), exist_ok=True)
+
+        added = {}
+        for gene in genes:
+            records = self.__added(gene, os.path.join(merged_fp, f"{gene}.fasta"))
+            if records is None:
+                self.__clear(gene)
+                continue
+            with open(os.path.join(self.added_fp, f"{gene}.fasta"), "w") as f:
+                for name, seq in records:
+                    f.write(f"> {name}\n{seq}\n")
+            self.__keep(
+                os.path.join(self.aligned_fp, f"{gene}.fasta"),
+                os.path.join(self.previous_fp, "aligned-sequences", f"{gene}.fasta"),
+            )
+            self.__keep(
+                os.path.join(self.trees_fp, f"RAxML_bestTree.{gene}"),
+                os.path.join(self.previous_fp, "trees", f"RAxML_bestTree.{gene}"),
+            )
+            added[gene] = len(records)
+
+        # The supermatrix tree only constrains the next one if no gene was realigned
+        self.__keep(
+            os.path.join(self.output, "RAxML_bestTree.supermatrix"),
+            os.path.join(self.previous_fp, "RAxML_bestTree.supermatrix"),
+            len(added) == len(genes),
+        )
+        logging.info(
+            f"{len(added)} of {len(genes)} genes can be updated incrementally, "
+            f"adding {sum(added.values())} sequences"
+        )
+        return added
+
+    @staticmethod
+    def read_fasta(fp: str) -> list:
+        """Returns (name, sequence) for each record, joining wrapped sequence lines"""
+        records = []
+        with open(fp) as f:
+            for line in f:
+                if line[:1] == ">":
+                    records.append((line[1:].strip(), []))
+                elif records:
+                    records[-1][1].append(line.strip())
+        return [(name, "".join(seq)) for name, seq in records]
+
+    @staticmethod
+    def residues_hash(seq: str) -> str:
+        """Hashes a sequence's residues, ignoring gaps and case"""
+        residues = seq.replace("-", "").replace(".", "").upper()
+        return hashlib.sha256(residues.encode()).hexdigest()
+
+    ### Private Methods
+
+    def __added(self, gene: str, merged_fp: str) -> list:
+        """Returns the merged records missing from gene's alignment, or None if it has
+        to be realigned from scratch"""
+        aligned_fp = os.path.join(self.aligned_fp, f"{gene}.fasta")
+        if not os.path.exists(aligned_fp):
+            return None
+
+        aligned = collections.Counter(
+            (name, self.residues_hash(seq)) for name, seq in self.read_fasta(aligned_fp)
+        )
+        merged = self.read_fasta(merged_fp)
+        missing = aligned - collections.Counter(
+            (name, self.residues_hash(seq)) for name, seq in merged
+        )
+        if missing:
+            logging.info(
+                f"{len(missing)} aligned {gene} sequences changed or went missing, realigning it"
+            )
+            return None
+
+        records = []
+        for name, seq in merged:
+            key = (name, self.residues_hash(seq))
+            if aligned[key]:
+                aligned[key] -= 1
+            else:
+                records.append((name, seq))
+        return records
+
+    def __clear(self, gene: str):
+        """Removes anything left from an earlier update of gene"""
+        for fp in [
+            os.path.join(self.added_fp, f"{gene}.fasta"),
+            os.path.join(self.previous_fp, "aligned-sequences", f"{gene}.fasta"),
+            os.path.join(self.previous_fp, "trees", f"RAxML_bestTree.{gene}"),
+        ]:
+            if os.path.exists(fp):
+                os.remove(fp)
+
+    @staticmethod
+    def __keep(fp: str, previous_fp: str, keep: bool = True):
+        """Copies fp to previous_fp, or removes a stale previous_fp"""
+        if keep and os.path.exists(fp):
+            shutil.copy2(fp, previous_fp)
+        elif os.path.exists(previous_fp):
+            os.remove(previous_fp)
@@ -0,0 +1,81 @@
+import gzip
+import logging
+import os
+import pyhmmer.plan7
+import pyhmmer.hmmer
+
+
+class ProfileSet:
+    """Profile HMMs loaded once and reused for every genome searched
+    If press is set, they're pressed (hmmpress) and cached next to the HMM file"""
+
+    PRESSED_EXTS = [".h3m", ".h3i", ".h3f", ".h3p"]
+    # https://www.ebi.ac.uk/interpro/download/pfam/
+    SCCG_URL = "https://github.com/merenlab/anvio/raw/master/anvio/data/hmm/Bacteria_71/genes.hmm.gz"
+
+    def __init__(self, hmm_fp: str, press: bool = True) -> None:
+        self.hmm_fp = hmm_fp
+        self.pressed_fp = hmm_fp[:-3] if hmm_fp[-3:] == ".gz" else hmm_fp
+        self.press = press
+
+        if self.press:
+            self.profiles = self.__load_pressed()
+        else:
+            self.profiles = self.__load_hmms()
+        logging.info(f"Loaded {len(self.profiles)} profiles from {self.hmm_fp}")
+
+    def __len__(self) -> int:
+        return len(self.profiles)
+
+    def names(self) -> list:
+        """Returns the names of all profiles in the set"""
+        return [p.name.decode() for p in self.profiles]
+
+    def search(self, proteins: list, cpus: int = 1):
+        """Runs hmmsearch of all profiles against proteins, yields one TopHits per profile"""
+        return pyhmmer.hmmsearch(
+            self.profiles, proteins, cpus=cpus, bit_cutoffs="trusted"
+        )
+
+    def copy(self):
+        """Returns a copy of the set that can be searched concurrently with this one"""
+        profile_set = ProfileSet.__new__(ProfileSet)
+        profile_set.hmm_fp = self.hmm_fp
+        profile_set.pressed_fp = self.pressed_fp
+        profile_set.press = self.press
+        profile_set.profiles = [p.copy() for p in self.profiles]
+        return profile_set
+
+    def is_pressed(self) -> bool:
+        """Tells whether an up to date pressed copy of the HMM file exists"""
+        for ext in self.PRESSED_EXTS:
+            fp = f"{self.pressed_fp}{ext}"
+            if not os.path.exists(fp):
+                return False
+            if os.path.getmtime(fp) < os.path.getmtime(self.hmm_fp):
+                return False
+        return True
+
+    ### Private Methods
+
+    def __load_hmms(self) -> list:
+        if self.hmm_fp[-3:] == ".gz":
+            with gzip.open(self.hmm_fp) as f:
+                with pyhmmer.plan7.HMMFile(f) as hmm_file:
+                    return list(hmm_file)
+        with pyhmmer.plan7.HMMFile(self.hmm_fp) as hmm_file:
+            return list(hmm_file)
+
+    def __load_pressed(self) -> list:
+        if not self.is_pressed():
+            logging.info(f"Pressing {self.hmm_fp} to {self.pressed_fp}.h3*")
+            try:
+                pyhmmer.hmmer.hmmpress(self.__load_hmms(), self.pressed_fp)
+            except OSError as e:
+                logging.warning(
+                    f"Couldn't write pressed profiles ({e}), using unpressed profiles..."
+                )
+                return self.__load_hmms()
+
+        with pyhmmer.plan7.HMMPressedFile(self.pressed_fp) as pressed_file:
+            return list(pressed_file)
@@ -0,0 +1,130 @@
+import hashlib
+import json
+import logging
+import os
+import threading
+
+
+class RunManifest:
+    """Append-only journal of which genomes have been filtered, read once per run
+    Each genome gets a start entry before its outputs are written and a done entry
+    with its input file's size, mtime, sha256, hits and the settings they were
+    selected with once they all are"""
+
+    def __init__(self, manifest_fp: str) -> None:
+        self.manifest_fp = manifest_fp
+        self.lock = threading.Lock()
+        self.torn = False
+        # Last done entry of each genome, kept through later start entries
+        self.finished = {}
+        self.entries = self.__read()
+
+    def is_done(self, name: str, fp: str) -> bool:
+        """Tells whether name finished filtering from the same input file as fp"""
+        entry = self.entries.get(name)
+        if not entry or entry["event"] != "done":
+            return False
+        if entry.get("legacy"):
+            return True
+        stat = os.stat(fp)
+        if stat.st_size != entry["size"]:
+            return False
+        if stat.st_mtime_ns == entry["mtime_ns"]:
+            return True
+        # Touched or copied, only rerun if the contents changed
+        return self.sha256(fp) == entry["sha256"]
+
+    def is_started(self, name: str) -> bool:
+        """Tells whether name has an entry, i.e. might have outputs on disk"""
+        return name in self.entries
+
+    def hits(self, name: str) -> list:
+        """Returns the genes recorded for name's last finished run"""
+        entry = self.entries.get(name)
+        return entry.get("hits", []) if entry else []
+
+    def selection(self, name: str) -> dict:
+        """Returns the selection settings of name's last finished run, None if they
+        weren't recorded (runs from before they were)"""
+        entry = self.entries.get(name)
+        return entry.get("selection") if entry else None
+
+    def start(self, name: str):
+        self.__append({"event": "start", "genome": name})
+
+    def done(
+        self,
+        name: str,
+        fp: str,
+        hits: list,
+        selection: dict = None,
+        sha256: str = None,
+    ):
+        """Records name as finished from fp, pass sha256 if fp's bytes were already
+        read, otherwise it's only rehashed if fp changed since name's last entry"""
+        stat = os.stat(fp)
+        if sha256 is None:
+            entry = self.finished.get(name, {})
+            if (
+                entry.get("sha256")
+                and entry.get("size") == stat.st_size
+                and entry.get("mtime_ns") == stat.st_mtime_ns
+            ):
+                sha256 = entry["sha256"]
+            else:
+                sha256 = self.sha256(fp)
+        self.__append(
+            {
+                "event": "done",
+                "genome": name,
+                "size": stat.st_size,
+                "mtime_ns": stat.st_mtime_ns,
+                "sha256": sha256,
+                "hits": sorted(hits),
+                "selection": selection,
+            }
+        )
+
+    def add_legacy(self, name: str):
+        """Records a genome finished by an older version (.done_ marker, no file info)"""
+        self.__append({"event": "done", "genome": name, "legacy": True})
+
+    @staticmethod
+    def sha256(fp: str) -> str:
+        h = hashlib.sha256()
+        with open(fp, "rb") as f:
+            for chunk in iter(lambda: f.read(1 << 20), b""):
+                h.update(chunk)
+        return h.hexdigest()
+
+    ### Private Methods
+
+    def __read(self) -> dict:
+        """Replays the journal, the last entry for each genome wins"""
+        entries = {}
+        if not os.path.exists(self.manifest_fp):
+            return entries
+        with open(self.manifest_fp) as f:
+            text = f.read()
+        for line in text.splitlines():
+            try:
+                entry = json.loads(line)
+                entries[entry["genome"]] = entry
+                if entry["event"] == "done":
+                    self.finished[entry["genome"]] = entry
+            except (ValueError, KeyError, TypeError):
+                logging.debug(f"Skipping bad line in {self.manifest_fp}: {line}")
+        # An interrupted run can leave a torn last line, don't append onto it
+        self.torn = bool(text) and text[-1] != "\n"
+        return entries
+
+    def __append(self, entry: dict):
+        with self.lock:
+            with open(self.manifest_fp, "a") as f:
+                if self.torn:
+                    f.write("\n")
+                    self.torn = False
+                f.write(f"{json.dumps(entry)}\n")
+            self.entries[entry["genome"]] = entry
+            if entry["event"] == "done":
+                self.finished[entry["genome"]] = entry
@@ -0,0 +1,91 @@
+import contextlib
+import cProfile
+import io
+import json
+import logging
+import os
+import pstats
+import resource
+import sys
+import threading
+import time
+
+
+class RunReport:
+    """Wall time, CPU time, peak RSS and I/O of each stage of a run plus timings for
+    each genome, written out as JSON
+    Peak RSS is the process's high-water mark so far, not the stage's own peak
+    Stages named in profile are also run under cProfile (main thread only)"""
+
+    def __init__(self, profile: list = None, profile_fp: str = None) -> None:
+        self.profile = profile if profile else []
+        self.profile_fp = profile_fp
+        self.lock = threading.Lock()
+        self.stages = []
+        self.genomes = {}
+
+    @contextlib.contextmanager
+    def stage(self, name: str):
+        """Measures the with block as stage name"""
+        profiler = cProfile.Profile() if name in self.profile else None
+        before = self.__usage()
+        if profiler:
+            profiler.enable()
+        try:
+            yield
+        finally:
+            if profiler:
+                profiler.disable()
+                self.__dump(name, profiler)
+            after = self.__usage()
+            self.stages.append(
+                {
+                    "stage": name,
+                    **{
+                        k: after[k] - before[k] if before[k] is not None else None
+                        for k in ["wall_s", "cpu_s", "read_bytes", "write_bytes"]
+                    },
+                    "peak_rss_so_far_mb": after["peak_rss_so_far_mb"],
+                }
+            )
+            logging.info(
+                f"{name} took {after['wall_s'] - before['wall_s']:.1f}s "
+                f"({after['cpu_s'] - before['cpu_s']:.1f}s CPU)"
+            )
+
+    def genome(self, name: str, stage: str, **values):
+        """Records values (e.g. seconds spent in each step) for one genome, thread safe"""
+        with self.lock:
+            self.genomes.setdefault(name, {})[stage] = values
+
+    def write(self, report_fp: str):
+        with open(report_fp, "w") as f:
+            json.dump({"stages": self.stages, "genomes": self.genomes}, f, indent=1)
+        logging.info(f"Wrote run report to {report_fp}")
+
+    ### Private Methods
+
+    @staticmethod
+    def __usage() -> dict:
+        usage = resource.getrusage(resource.RUSAGE_SELF)
+        # ru_maxrss is in KB on Linux and bytes on macOS
+        rss_mb = usage.ru_maxrss / (1 << 20 if sys.platform == "darwin" else 1 << 10)
+        read_bytes = write_bytes = None
+        if os.path.exists("/proc/self/io"):
+            with open("/proc/self/io") as f:
+                counters = dict(l.split(": ") for l in f.read().splitlines())
+            read_bytes, write_bytes = int(counters["rchar"]), int(counters["wchar"])
+        return {
+            "wall_s": time.perf_counter(),
+            "cpu_s": usage.ru_utime + usage.ru_stime,
+            "read_bytes": read_bytes,
+            "write_bytes": write_bytes,
+            "peak_rss_so_far_mb": round(rss_mb, 1),
+        }
+
+    def __dump(self, name: str, profiler: cProfile.Profile):
+        if self.profile_fp:
+            profiler.dump_stats(f"{self.profile_fp}{name}.prof")
+        stream = io.StringIO()
+        pstats.Stats(profiler, stream=stream).sort_stats("cumulative").print_stats(20)
+        logging.info(f"Profile of {name}:\n{stream.getvalue()}")
@@ -18,14 +18,24 @@ def collect_genomes(args: dict):
     gc_args = {
         k: v
         for k, v in args.items()
-        if v and k in ["output_fp", "ncbi_species", "ncbi_accessions", "local_fp"]
+        if v
+        and k
+        in [
+            "output_fp",
+            "ncbi_species",
+            "ncbi_accessions",
+            "local_fp",
+            "decompress",
+            "threads",
+            "mirror",
+        ]
     }
 
-    gc = GenomeCollection(**gc_args)
+    # --all is resolved in the same pass over the assembly summary as the rest
+    gc = GenomeCollection(**gc_args, all_species=bool(args["all"]))
 
-    if args["all"]:
-        gc.all_species()
     if args["n"]:
         gc.dryrun()
+        gc.estimate()
     else:
         gc.collect()
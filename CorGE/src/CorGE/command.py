@@ -3,8 +3,6 @@ import logging
 import sys
 from enum import Enum
 from pathlib import Path
-from .collect import collect_genomes
-from .extract import extract_genes
 
 
 class FileType(Enum):
@@ -33,14 +31,26 @@ def _collect_genomes(args: argparse.Namespace):
         sys.exit(1)
 
     logging.getLogger().setLevel(args.log_level)
+    # Subcommands are only imported when run, so --help and parsing stay quick
+    from .collect import collect_genomes
+
     collect_genomes(vars(args))
 
 
 def _extract_genes(args: argparse.Namespace):
     logging.getLogger().setLevel(args.log_level)
+    from .extract import extract_genes
+
     extract_genes(vars(args))
 
 
+def _reselect_genes(args: argparse.Namespace):
+    logging.getLogger().setLevel(args.log_level)
+    from .extract import reselect_genes
+
+    reselect_genes(vars(args))
+
+
 def dir_path(d: str):
     if Path.is_dir(Path(d)):
         return d
@@ -60,6 +70,10 @@ def main(argv=None):
         "extract_genes",
         help="Extract SCCGs from all collected genomes and curate data for tree building",
     )
+    reselect_genes_subparser = subparsers.add_parser(
+        "reselect_genes",
+        help="Reselect SCCGs from the hit tables extract_genes saved, with new cutoffs or tie rule, without searching the genomes again",
+    )
 
     collect_genomes_subparser.add_argument(
         "--output_fp",
@@ -92,11 +106,28 @@ def main(argv=None):
         type=str,
         help="Specify the outgroup for tree rooting. Integers will be parsed as species level taxon ids and retrieved from NCBI. Otherwise will search for a matching nucleotide-encoded file in ouput_dir or local (Default: 2173, enter None to not use outgroup rooting)",
     )
+    collect_genomes_subparser.add_argument(
+        "--decompress",
+        action="store_true",
+        default=False,
+        help="Decompress downloaded genomes, otherwise they're kept gzipped (extract_genes reads either)",
+    )
+    collect_genomes_subparser.add_argument(
+        "--threads",
+        type=int,
+        default=1,
+        help="Number of genomes to download in parallel (Default: 1)",
+    )
+    collect_genomes_subparser.add_argument(
+        "--mirror",
+        type=str,
+        help="Base URL of a mirror of NCBI's FTP site to fetch genomes from, replacing the https://ftp.ncbi.nlm.nih.gov host root (genome paths keep their /genomes/all/... part)",
+    )
     collect_genomes_subparser.add_argument(
         "-n",
         action="store_true",
         default=False,
-        help="Dry run, show what would be gathered but don't do it",
+        help="Dry run, show what would be gathered and estimate its download size, disk use and hmmsearch time but don't do it",
     )
     collect_genomes_subparser.add_argument(
         "--log_level",
@@ -107,42 +138,96 @@ def main(argv=None):
     collect_genomes_subparser.set_defaults(func=_collect_genomes)
 
     extract_genes_subparser.add_argument(
-        "--genomes",
-        type=dir_path,
-        help="Directory with collected genomes (curated with collect_genomes) (Default: ./output/genomes/)",
-    )
-    extract_genes_subparser.add_argument(
-        "-o",
-        "--output",
-        type=dir_path,
-        help="Directory to write output to (Default: ./output/)",
-    )
-    extract_genes_subparser.add_argument(
-        "-t",
-        "--file_type",
-        type=FileType,
-        choices=list(FileType),
-        help="Output in merged-sequences can be nucleotide- or protein-encoded (Default: prot)",
-    )
-    extract_genes_subparser.add_argument(
-        "-n",
-        "--name_type",
-        type=NameType,
-        choices=list(NameType),
-        help="Names to show on final tree (Default: txid)",
-    )
-    extract_genes_subparser.add_argument(
-        "--outgroup",
-        type=str,
-        help="Outgroup to use for tree rooting, name must correspond with files in the genomes dir (Default: 2173)",
+        "--dryrun",
+        action="store_true",
+        default=False,
+        help="Show how many genomes would be filtered and estimate the hmmsearch time but don't do it",
     )
     extract_genes_subparser.add_argument(
-        "--log_level",
-        type=int,
-        default=20,
-        help="Sets the log level, default is info, 10 for debug (Default: 20)",
-    )
+        "--profile",
+        nargs="+",
+        choices=["filter_prot", "filter_nucl", "merge", "write_config"],
+        help="Run these stages under cProfile, stats are logged and saved to output/profile-{stage}.prof (timings of every stage always go to output/run-report.json)",
+    )
+    reselect_genes_subparser.add_argument(
+        "--profile",
+        nargs="+",
+        choices=["reselect", "filter_nucl", "merge", "write_config"],
+        help="Run these stages under cProfile, stats are logged and saved to output/profile-{stage}.prof",
+    )
+    for subparser in [extract_genes_subparser, reselect_genes_subparser]:
+        subparser.add_argument(
+            "--genomes",
+            type=dir_path,
+            help="Directory with collected genomes (curated with collect_genomes) (Default: ./output/genomes/)",
+        )
+        subparser.add_argument(
+            "-o",
+            "--output",
+            type=dir_path,
+            help="Directory to write output to (Default: ./output/)",
+        )
+        subparser.add_argument(
+            "-t",
+            "--file_type",
+            type=FileType,
+            choices=list(FileType),
+            help="Output in merged-sequences can be nucleotide- or protein-encoded (Default: prot)",
+        )
+        subparser.add_argument(
+            "-n",
+            "--name_type",
+            type=NameType,
+            choices=list(NameType),
+            help="Names to show on final tree (Default: txid)",
+        )
+        subparser.add_argument(
+            "--outgroup",
+            type=str,
+            help="Outgroup to use for tree rooting, name must correspond with files in the genomes dir (Default: 2173)",
+        )
+        subparser.add_argument(
+            "--threads",
+            type=int,
+            default=1,
+            help="Number of genomes to search for SCCGs in parallel (Default: 1)",
+        )
+        subparser.add_argument(
+            "--layout",
+            type=str,
+            choices=["split", "packed"],
+            help="How to store filtered-sequences, split is one file per gene per genome, packed is one file per genome (Default: split)",
+        )
+        subparser.add_argument(
+            "--incremental",
+            action="store_true",
+            default=False,
+            help="Have the workflow add new genomes to the existing alignments and trees in output instead of rebuilding them",
+        )
+        subparser.add_argument(
+            "--min_score",
+            type=float,
+            help="Only select hits scoring at least this many bits, on top of each profile's trusted cutoff (Default: 0)",
+        )
+        subparser.add_argument(
+            "--max_evalue",
+            type=float,
+            help="Only select hits with at most this E-value (Default: no limit)",
+        )
+        subparser.add_argument(
+            "--ties",
+            type=str,
+            choices=["drop", "first"],
+            help="What to do with a protein scoring equally for two SCCGs, drop it or keep it for the first one alphabetically (Default: drop)",
+        )
+        subparser.add_argument(
+            "--log_level",
+            type=int,
+            default=20,
+            help="Sets the log level, default is info, 10 for debug (Default: 20)",
+        )
     extract_genes_subparser.set_defaults(func=_extract_genes)
+    reselect_genes_subparser.set_defaults(func=_reselect_genes)
 
     args = main_parser.parse_args(argv)
 
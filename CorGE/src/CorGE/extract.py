@@ -1,7 +1,9 @@
+import os
 from .GeneCollection import GeneCollection
+from .RunReport import RunReport
 
 
-def extract_genes(args: dict):
+def _gene_collection(args: dict, report: RunReport) -> GeneCollection:
     if args["file_type"]:
         args["file_type"] = str(args["file_type"])
     if args["name_type"]:
@@ -10,12 +12,56 @@ def extract_genes(args: dict):
     gc_args = {
         k: v
         for k, v in args.items()
-        if v and k in ["genomes", "output", "file_type", "name_type", "outgroup"]
+        if v
+        and k
+        in [
+            "genomes",
+            "output",
+            "file_type",
+            "name_type",
+            "outgroup",
+            "threads",
+            "layout",
+            "incremental",
+            "min_score",
+            "max_evalue",
+            "ties",
+        ]
     }
 
-    gc = GeneCollection(**gc_args)
+    gc = GeneCollection(**gc_args, report=report)
+    report.profile_fp = os.path.join(gc.output, "profile-")
+    return gc
+
+
+def extract_genes(args: dict):
+    report = RunReport(args.get("profile") or [])
+    gc = _gene_collection(args, report)
+    if args.get("dryrun"):
+        gc.dryrun()
+        return
+
+    with report.stage("filter_prot"):
+        gc.filter_prot()
+    with report.stage("filter_nucl"):
+        gc.filter_nucl()
+    with report.stage("merge"):
+        gc.merge()
+    with report.stage("write_config"):
+        gc.write_config()
+    report.write(os.path.join(gc.output, "run-report.json"))
+
+
+def reselect_genes(args: dict):
+    report = RunReport(args.get("profile") or [])
+    gc = _gene_collection(args, report)
 
-    gc.filter_prot()
-    gc.filter_nucl()
-    gc.merge()
-    gc.write_config()
+    with report.stage("reselect"):
+        gc.reselect()
+    with report.stage("filter_nucl"):
+        gc.filter_nucl()
+    with report.stage("merge"):
+        gc.merge()
+    with report.stage("write_config"):
+        gc.write_config()
+    report.write(os.path.join(gc.output, "run-report.json"))
@@ -1,4 +1,6 @@
+import gzip
 import os
+import pyhmmer
 import tempfile
 
 TESTS_FP = os.path.dirname(os.path.realpath(__file__))
@@ -9,3 +11,26 @@ GENOMES_FP = os.path.join(OUTPUT_FP, "genomes/")
 FILTERED_FP = os.path.join(OUTPUT_FP, "filtered-sequences/")
 FILTERED_NUCL_FP = os.path.join(OUTPUT_FP, "filtered-nucl-sequences/")
 MERGED_FP = os.path.join(OUTPUT_FP, "merged-sequences/")
+
+
+def write_test_hmms(fp: str) -> str:
+    """Writes a gzipped ADK and PGK profile built from single proteins to fp, a quick
+    local stand-in for the SCCG HMMs"""
+    alphabet = pyhmmer.easel.Alphabet.amino()
+    builder = pyhmmer.plan7.Builder(alphabet)
+    background = pyhmmer.plan7.Background(alphabet)
+    with pyhmmer.easel.SequenceFile(
+        os.path.join(TEST_DATA_FP, "collected-genomes", "GCF_000007725.1.faa"),
+        digital=True,
+        alphabet=alphabet,
+    ) as seqs_file:
+        proteins = list(seqs_file)
+
+    os.makedirs(os.path.dirname(fp), exist_ok=True)
+    with gzip.open(fp, "wb") as f:
+        for name, protein in zip([b"ADK", b"PGK"], proteins[:2]):
+            hmm, _, _ = builder.build(protein, background)
+            hmm.name = name
+            hmm.cutoffs.trusted = (25.0, 25.0)
+            hmm.write(f)
+    return fp
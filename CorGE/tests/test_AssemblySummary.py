@@ -0,0 +1,99 @@
+import os
+import pytest
+import shutil
+from src.CorGE.AssemblySummary import AssemblySummary
+from . import TEMP_FP
+
+HEADER = [
+    "assembly_accession",
+    "bioproject",
+    "biosample",
+    "wgs_master",
+    "refseq_category",
+    "taxid",
+    "species_taxid",
+    "organism_name",
+    "infraspecific_name",
+    "isolate",
+    "version_status",
+    "assembly_level",
+    "release_type",
+    "genome_rep",
+    "seq_rel_date",
+    "asm_name",
+    "submitter",
+    "gbrs_paired_asm",
+    "paired_asm_comparison",
+    "ftp_path",
+]
+
+
+def row(acc: str, refseq: str, tx_id: str) -> str:
+    fields = [""] * len(HEADER)
+    fields[0] = acc
+    fields[4] = refseq
+    fields[6] = tx_id
+    fields[7] = f"Org {tx_id}"
+    fields[8] = f"strain={acc}"
+    fields[19] = f"https://ftp.ncbi.nlm.nih.gov/{acc}"
+    return "\t".join(fields) + "\n"
+
+
+@pytest.fixture
+def assembly_summary_fp():
+    fp = os.path.join(TEMP_FP, "assembly-summary", "assembly_summary.txt")
+    os.makedirs(os.path.dirname(fp), exist_ok=True)
+    with open(fp, "w") as f:
+        f.write("#   See README_assembly_summary.txt\n")
+        f.write("# " + "\t".join(HEADER) + "\n")
+        f.write(row("GCF_1.1", "na", "10"))
+        f.write(row("GCF_2.1", "representative genome", "10"))
+        f.write(row("GCF_3.1", "reference genome", "20"))
+        f.write(row("GCF_4.1", "representative genome", "10"))
+        f.write("GCF_5.1\t\t\t\tna\t30\t30\n")  # Incomplete entry
+        f.write(row("GCF_6.1", "representative genome", "30"))
+    yield fp
+    shutil.rmtree(os.path.dirname(fp))
+
+
+def test_assembly_summary(assembly_summary_fp):
+    a = AssemblySummary(assembly_summary_fp)
+    assert os.path.exists(a.db_fp)
+
+    species = ["30", "10", "99"]
+    assert a.accessions_for_species(species) == [
+        ("GCF_2.1", "10", "https://ftp.ncbi.nlm.nih.gov/GCF_2.1"),
+        ("GCF_6.1", "30", "https://ftp.ncbi.nlm.nih.gov/GCF_6.1"),
+    ]
+    assert species == ["30", "10", "99"]
+    assert a.species_for_accessions(["GCF_3.1", "GCF_1.1", "GCF_5.1"]) == [
+        ("GCF_1.1", "10", "https://ftp.ncbi.nlm.nih.gov/GCF_1.1"),
+        ("GCF_3.1", "20", "https://ftp.ncbi.nlm.nih.gov/GCF_3.1"),
+    ]
+    assert [v[0] for v in a.all_species()] == ["GCF_2.1", "GCF_3.1", "GCF_6.1"]
+    assert a.names(["GCF_3.1", "GCF_9.1"], "organism_name") == {"GCF_3.1": "Org 20"}
+
+
+def test_assembly_summary_rebuild(assembly_summary_fp):
+    AssemblySummary(assembly_summary_fp).close()
+    with open(assembly_summary_fp, "a") as f:
+        f.write(row("GCF_7.1", "representative genome", "40"))
+
+    assert AssemblySummary(assembly_summary_fp).accessions_for_species(["40"]) == [
+        ("GCF_7.1", "40", "https://ftp.ncbi.nlm.nih.gov/GCF_7.1")
+    ]
+
+
+def test_assembly_summary_select(assembly_summary_fp):
+    a = AssemblySummary(assembly_summary_fp)
+
+    assert [v[0] for v in a.select(["10", "10"], ["GCF_2.1", "GCF_3.1"])] == [
+        "GCF_2.1",
+        "GCF_3.1",
+    ]
+    assert [v[0] for v in a.select([], ["GCF_1.1"], True)] == [
+        "GCF_1.1",
+        "GCF_2.1",
+        "GCF_3.1",
+        "GCF_6.1",
+    ]
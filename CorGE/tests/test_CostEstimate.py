@@ -0,0 +1,72 @@
+import gzip
+import json
+import os
+import pytest
+import shutil
+from src.CorGE.CostEstimate import CostEstimate
+from src.CorGE.Genome import AccessionGenome, LocalGenome
+from src.CorGE.ProfileSet import ProfileSet
+from . import TEST_DATA_FP, TEMP_FP, write_test_hmms
+
+COLLECTED_FP = os.path.join(TEST_DATA_FP, "collected-genomes")
+
+
+@pytest.fixture
+def estimate_output():
+    output = os.path.join(TEMP_FP, "estimate-output")
+    genomes_fp = os.path.join(output, "genomes")
+    os.makedirs(genomes_fp)
+    # GCF_000007725.1 is already collected, gzipped like a download leaves it
+    for ext in [".faa", ".fna"]:
+        with open(os.path.join(COLLECTED_FP, f"GCF_000007725.1{ext}"), "rb") as f_in:
+            with gzip.open(
+                os.path.join(genomes_fp, f"GCF_000007725.1{ext}.gz"), "wb"
+            ) as f_out:
+                shutil.copyfileobj(f_in, f_out)
+    yield output, genomes_fp
+    shutil.rmtree(output)
+
+
+def test_cost_estimate_sizes(estimate_output):
+    output, genomes_fp = estimate_output
+    fp = os.path.join(genomes_fp, "GCF_000007725.1.faa.gz")
+    assert CostEstimate.uncompressed_size(fp) == os.path.getsize(
+        os.path.join(COLLECTED_FP, "GCF_000007725.1.faa")
+    )
+    ratios = CostEstimate(output).ratios(genomes_fp)
+    assert ratios[".faa"] == CostEstimate.uncompressed_size(fp) / os.path.getsize(fp)
+    assert CostEstimate.human(1500000) == "1.5MB"
+
+
+def test_cost_estimate_collection(estimate_output):
+    output, genomes_fp = estimate_output
+    url = "https://ftp.ncbi.nlm.nih.gov/genomes/all/GCF/000/016/525/GCF_000016525.1_ASM1652v1"
+    genomes = [
+        AccessionGenome("GCF_000007725.1", "9", url.replace("016/525", "007/725")),
+        AccessionGenome("GCF_000016525.1", "2173", url),
+        LocalGenome("GCF_000020965.1", os.path.join(TEST_DATA_FP, "TEST_LOCAL")),
+    ]
+    # Cached sizes mean no requests are made
+    sizes = {genomes[1].file_url(".faa"): 300000, genomes[1].file_url(".fna"): 600000}
+    with open(os.path.join(output, "genome-sizes.json"), "w") as f:
+        json.dump(sizes, f)
+
+    # Local profiles, so calibrating needs no network
+    profiles = ProfileSet(
+        write_test_hmms(os.path.join(output, "profiles", "genes.hmm.gz")), press=False
+    )
+    estimate = CostEstimate(output, sample=1, profiles=profiles).collection(
+        genomes, genomes_fp, False
+    )
+    local_bytes = sum(
+        os.path.getsize(
+            os.path.join(TEST_DATA_FP, "TEST_LOCAL", f"GCF_000020965.1{ext}")
+        )
+        for ext in [".faa", ".fna"]
+    )
+    assert estimate["genomes"] == 3
+    assert estimate["present"] == 1
+    assert estimate["download_bytes"] == 900000
+    assert estimate["disk_bytes"] == 900000 + local_bytes
+    assert estimate["cpu_s_per_mb"] > 0
+    assert not os.path.exists(os.path.join(output, "genes.hmm.gz"))
@@ -0,0 +1,174 @@
+import gzip
+import hashlib
+import http.server
+import os
+import pytest
+import shutil
+import threading
+from src.CorGE.Downloader import Downloader, DownloadError, MissingFileError
+from src.CorGE.Genome import AccessionGenome
+from . import TEST_DATA_FP, TEMP_FP
+
+ASSEMBLY = "GCF_000007725.1_ASM1v1"
+
+
+class StandInHandler(http.server.BaseHTTPRequestHandler):
+    """Serves FILES with keep-alive and Range support, failing on request"""
+
+    protocol_version = "HTTP/1.1"
+    files = {}
+    fail_once = set()
+    truncate_once = set()
+    connections = set()
+    requests = []
+
+    def do_GET(self):
+        StandInHandler.connections.add(self.client_address)
+        StandInHandler.requests.append(self.path)
+        if self.path not in self.files:
+            self.send_response(404)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+        if self.path in self.fail_once:
+            self.fail_once.remove(self.path)
+            self.send_response(500)
+            self.send_header("Content-Length", "0")
+            self.end_headers()
+            return
+
+        data = self.files[self.path]
+        start = 0
+        if self.headers.get("Range"):
+            start = int(self.headers["Range"].split("=")[1].split("-")[0])
+            if start >= len(data):
+                self.send_response(416)
+                self.send_header("Content-Length", "0")
+                self.end_headers()
+                return
+            self.send_response(206)
+        else:
+            self.send_response(200)
+        self.send_header("Content-Length", str(len(data) - start))
+        self.end_headers()
+        if self.path in self.truncate_once:
+            self.truncate_once.remove(self.path)
+            self.wfile.write(data[start : start + (len(data) - start) // 2])
+            self.close_connection = True
+            return
+        self.wfile.write(data[start:])
+
+    def log_message(self, format, *args):
+        pass
+
+
+@pytest.fixture
+def server():
+    faa = open(
+        os.path.join(TEST_DATA_FP, "collected-genomes", "GCF_000007725.1.faa"), "rb"
+    ).read()
+    fna = open(
+        os.path.join(TEST_DATA_FP, "collected-genomes", "GCF_000007725.1.fna"), "rb"
+    ).read()
+    faa_gz = gzip.compress(faa)
+    fna_gz = gzip.compress(fna)
+    StandInHandler.files = {
+        f"/{ASSEMBLY}/{ASSEMBLY}_protein.faa.gz": faa_gz,
+        f"/{ASSEMBLY}/{ASSEMBLY}_cds_from_genomic.fna.gz": fna_gz,
+        f"/{ASSEMBLY}/md5checksums.txt": (
+            f"{hashlib.md5(faa_gz).hexdigest()}  ./{ASSEMBLY}_protein.faa.gz\n"
+            f"{hashlib.md5(fna_gz).hexdigest()}  ./{ASSEMBLY}_cds_from_genomic.fna.gz\n"
+        ).encode(),
+    }
+    StandInHandler.fail_once = set()
+    StandInHandler.truncate_once = set()
+    StandInHandler.connections = set()
+    StandInHandler.requests = []
+
+    httpd = http.server.ThreadingHTTPServer(("127.0.0.1", 0), StandInHandler)
+    thread = threading.Thread(target=httpd.serve_forever, daemon=True)
+    thread.start()
+    out = os.path.join(TEMP_FP, "downloads")
+    os.makedirs(os.path.join(out, "genomes"), exist_ok=True)
+    yield f"http://127.0.0.1:{httpd.server_address[1]}", out
+    httpd.shutdown()
+    httpd.server_close()
+    shutil.rmtree(out)
+
+
+def test_download_keep_alive(server):
+    url, out = server
+    d = Downloader(backoff=0)
+    checksums = d.md5_checksums(f"{url}/{ASSEMBLY}")
+    assert len(checksums) == 2
+    for name in [f"{ASSEMBLY}_protein.faa.gz", f"{ASSEMBLY}_cds_from_genomic.fna.gz"]:
+        d.download(f"{url}/{ASSEMBLY}/{name}", os.path.join(out, name), checksums[name])
+        assert Downloader.md5sum(os.path.join(out, name)) == checksums[name]
+    d.close()
+
+    # All three requests reused one connection
+    assert len(StandInHandler.connections) == 1
+
+
+def test_close_all(server):
+    url, out = server
+    d = Downloader(backoff=0)
+    names = [f"{ASSEMBLY}_protein.faa.gz", f"{ASSEMBLY}_cds_from_genomic.fna.gz"]
+    # Both threads stay alive until both are done, like a pool's workers
+    barrier = threading.Barrier(len(names))
+
+    def download(name):
+        d.download(f"{url}/{ASSEMBLY}/{name}", os.path.join(out, name))
+        barrier.wait()
+
+    threads = [threading.Thread(target=download, args=(name,)) for name in names]
+    for t in threads:
+        t.start()
+    for t in threads:
+        t.join()
+    conns = list(d.connections.values())
+    assert len(conns) == 2
+
+    # Connections left open by worker threads are closed from the main thread
+    d.close_all()
+    assert not d.connections
+    assert all(conn.sock is None for conn in conns)
+
+
+def test_download_retry_and_resume(server):
+    url, out = server
+    path = f"/{ASSEMBLY}/{ASSEMBLY}_protein.faa.gz"
+    StandInHandler.fail_once.add(path)
+    StandInHandler.truncate_once.add(path)
+    dest = os.path.join(out, "protein.faa.gz")
+
+    Downloader(backoff=0).download(
+        f"{url}{path}", dest, hashlib.md5(StandInHandler.files[path]).hexdigest()
+    )
+
+    assert open(dest, "rb").read() == StandInHandler.files[path]
+    assert not os.path.exists(f"{dest}.part")
+    assert StandInHandler.requests.count(path) == 3
+
+
+def test_download_errors(server):
+    url, out = server
+    d = Downloader(retries=1, backoff=0)
+    with pytest.raises(MissingFileError):
+        d.download(f"{url}/missing.faa.gz", os.path.join(out, "missing.faa.gz"))
+    with pytest.raises(DownloadError):
+        d.download(
+            f"{url}/{ASSEMBLY}/{ASSEMBLY}_protein.faa.gz",
+            os.path.join(out, "bad.faa.gz"),
+            "0" * 32,
+        )
+
+
+def test_accession_genome_download(server):
+    url, out = server
+    g = AccessionGenome("GCF_000007725.1", "9", f"{url}/{ASSEMBLY}")
+    g.download(out, Downloader(backoff=0))
+
+    assert set(os.listdir(os.path.join(out, "genomes"))) == set(
+        ["GCF_000007725.1.faa.gz", "GCF_000007725.1.fna.gz"]
+    )
@@ -0,0 +1,70 @@
+import gzip
+import os
+import pytest
+import shutil
+from src.CorGE.FastaIndex import FastaIndex
+from . import TEST_DATA_FP, TEMP_FP
+
+
+@pytest.fixture
+def fasta_fp():
+    fp = os.path.join(TEMP_FP, "fasta-index", "GCF_000007725.1.faa")
+    os.makedirs(os.path.dirname(fp), exist_ok=True)
+    shutil.copyfile(
+        os.path.join(TEST_DATA_FP, "collected-genomes", "GCF_000007725.1.faa"), fp
+    )
+    yield fp
+    shutil.rmtree(os.path.dirname(fp))
+
+
+@pytest.fixture
+def gzipped_fasta_fp(fasta_fp):
+    with open(fasta_fp, "rb") as f_in, gzip.open(f"{fasta_fp}.gz", "wb") as f_out:
+        shutil.copyfileobj(f_in, f_out)
+    yield f"{fasta_fp}.gz"
+
+
+@pytest.fixture
+def prefix_fasta_fp():
+    fp = os.path.join(TEMP_FP, "fasta-index-prefix", "prefix.fna")
+    os.makedirs(os.path.dirname(fp), exist_ok=True)
+    with open(fp, "w") as f:
+        f.write(">lcl|NC_1_cds_WP_1.1_10 [protein_id=WP_1.1]\nACGT\nAC\n")
+        f.write(">lcl|NC_1_cds_WP_1.10_11 [protein_id=WP_1.10]\nTTTT\nTTTT\nT\n")
+    yield fp
+    shutil.rmtree(os.path.dirname(fp))
+
+
+def test_fasta_index(fasta_fp):
+    fi = FastaIndex(fasta_fp)
+    assert os.path.exists(f"{fasta_fp}.fai")
+    assert len(fi) == 513
+    assert fi.names()[0] == "WP_011091146.1"
+
+    records = fi.fetch(["WP_011091539.1", "WP_011091146.1", "NOT_A_RECORD"])
+    assert set(records.keys()) == set(["WP_011091539.1", "WP_011091146.1"])
+    assert records["WP_011091539.1"] == (
+        "WP_011091539.1 nucleoside monophosphate kinase [Buchnera aphidicola]",
+        "MHIVLIGGPGTGKGTQAELLSKKYMLPVISTGHILRKISTKKTLFGEKIKNIINSGKLVPDTIIIKIITNEILHKNYTNGFILDGFPRTIKQAKNLKNTNIQIDYVFEFILPTKLIFKRIQTRTINPITGTIYNNVIQKNSELKNLKINTLKSRLDDQYPIILKRLKEHKKNIVYLKDFYINEQKHKSLKYHEINSQNTIKNVNIEIKKILENKL",
+    )
+
+    # Reloaded from the persisted .fai
+    assert FastaIndex(fasta_fp).fetch(["WP_011091539.1"]) == {
+        "WP_011091539.1": records["WP_011091539.1"]
+    }
+
+
+def test_fasta_index_gzipped(fasta_fp, gzipped_fasta_fp):
+    names = ["WP_011091539.1", "WP_011091146.1", "WP_011091615.1"]
+    assert FastaIndex(gzipped_fasta_fp).fetch(names) == FastaIndex(fasta_fp).fetch(
+        names
+    )
+
+
+def test_fasta_index_exact_ids(prefix_fasta_fp):
+    def key(record_id):
+        return record_id.split("_cds_")[1].rsplit("_", 1)[0]
+
+    records = FastaIndex(prefix_fasta_fp).fetch(["WP_1.10", "WP_1.1"], key)
+    assert records["WP_1.1"][1] == "ACGTAC"
+    assert records["WP_1.10"][1] == "TTTTTTTTT"
@@ -0,0 +1,66 @@
+import os
+import pytest
+import shutil
+from src.CorGE.FilteredSequences import FilteredSequences
+from . import TEMP_FP
+
+RECORDS = [
+    ("ADK", "WP_1.1 adenylate kinase", "MKV"),
+    ("PGK", "WP_2.1 phosphoglycerate kinase", "MLLA"),
+]
+
+
+@pytest.fixture
+def filtered_fp():
+    fp = os.path.join(TEMP_FP, "filtered-sequences-layout")
+    os.makedirs(fp, exist_ok=True)
+    yield fp
+    shutil.rmtree(fp)
+
+
+def test_split_layout(filtered_fp):
+    fs = FilteredSequences(filtered_fp, ".faa")
+    fs.write("GCF_1.1", RECORDS)
+
+    assert set(os.listdir(filtered_fp)) == set(["ADK__GCF_1.1.faa", "PGK__GCF_1.1.faa"])
+    assert list(fs.read()) == [("GCF_1.1", RECORDS)]
+
+
+def test_packed_layout(filtered_fp):
+    fs = FilteredSequences(filtered_fp, ".faa", "packed")
+    fs.write("GCF_1.1", RECORDS)
+    FilteredSequences(filtered_fp, ".faa").write("GCF_2.1", RECORDS[:1])
+    with open(os.path.join(filtered_fp, ".manifest"), "w") as f:
+        f.write("")
+
+    assert os.listdir(filtered_fp).count("GCF_1.1.faa") == 1
+    assert fs.names() == ["GCF_1.1", "GCF_2.1"]
+    assert list(fs.read()) == [("GCF_1.1", RECORDS), ("GCF_2.1", RECORDS[:1])]
+
+    fs.remove("GCF_1.1", [])
+    fs.remove("GCF_2.1", ["ADK"])
+    assert fs.names() == []
+
+
+def test_wrapped_sequences(filtered_fp):
+    with open(os.path.join(filtered_fp, "ADK__GCF_1.1.faa"), "w") as f:
+        f.write(">WP_1.1 adenylate kinase\nMK\nV\n")
+
+    assert list(FilteredSequences(filtered_fp, ".faa").read()) == [
+        ("GCF_1.1", RECORDS[:1])
+    ]
+
+
+def test_records(filtered_fp):
+    FilteredSequences(filtered_fp, ".faa").write("GCF_2.1", RECORDS)
+    FilteredSequences(filtered_fp, ".faa").write("GCF_1.1", RECORDS)
+    FilteredSequences(filtered_fp, ".faa", "packed").write("GCF_3.1", RECORDS)
+
+    assert [r[:2] for r in FilteredSequences(filtered_fp, ".faa").records()] == [
+        ("ADK", "GCF_1.1"),
+        ("ADK", "GCF_2.1"),
+        ("PGK", "GCF_1.1"),
+        ("PGK", "GCF_2.1"),
+        ("ADK", "GCF_3.1"),
+        ("PGK", "GCF_3.1"),
+    ]
@@ -1,7 +1,25 @@
+import gzip
+import json
 import os
 import pytest
+import shutil
 from src.CorGE.GeneCollection import GeneCollection
-from . import TEST_DATA_FP, OUTPUT_FP, FILTERED_FP, FILTERED_NUCL_FP, MERGED_FP
+from . import (
+    TEST_DATA_FP,
+    TEMP_FP,
+    OUTPUT_FP,
+    FILTERED_FP,
+    FILTERED_NUCL_FP,
+    MERGED_FP,
+    write_test_hmms,
+)
+
+
+def merged_mtimes() -> dict:
+    return {
+        fp: os.stat(os.path.join(MERGED_FP, fp)).st_mtime_ns
+        for fp in os.listdir(MERGED_FP)
+    }
 
 
 @pytest.fixture
@@ -33,3 +51,160 @@ def test_gene_collection(gene_collection):
     assert len(os.listdir(MERGED_FP)) == 71
     gc.write_config()
     assert "config.yml" in os.listdir(OUTPUT_FP)
+
+    # Merging again only replaces the files whose contents change
+    mtimes = merged_mtimes()
+    gc.merge()
+    assert merged_mtimes() == mtimes
+    os.remove(os.path.join(FILTERED_NUCL_FP, "ADK__GCF_000007725.1.fna"))
+    gc.merge()
+    assert [fp for fp, t in merged_mtimes().items() if t != mtimes[fp]] == ["ADK.fasta"]
+
+
+@pytest.fixture
+def threaded_gene_collection():
+    yield GeneCollection(
+        os.path.join(TEST_DATA_FP, "collected-genomes"),
+        os.path.join(TEMP_FP, "threaded-output/"),
+        "nucl",
+        threads=4,
+    )
+
+
+def test_threaded_gene_collection(threaded_gene_collection):
+    gc = threaded_gene_collection
+    gc.filter_prot()
+    filtered = set(os.listdir(gc.filtered_fp))
+    assert set(
+        [
+            "Adenylsucc_synt__GCF_000016525.1.faa",
+            "ADK__GCF_000007725.1.faa",
+            "PGK__GCF_000016525.1.faa",
+        ]
+    ).issubset(filtered)
+    genomes_fp = os.path.join(TEST_DATA_FP, "collected-genomes")
+    for fp in os.listdir(genomes_fp):
+        if fp[-4:] == ".faa":
+            assert gc.manifest.is_done(fp[:-4], os.path.join(genomes_fp, fp))
+    assert "ADK" in gc.manifest.hits("GCF_000007725.1")
+    assert gc.report.genomes["GCF_000007725.1"]["filter_prot"]["hmmsearch_s"] > 0
+    gc.filter_nucl()
+    assert set(
+        [
+            "Adenylsucc_synt__GCF_000016525.1.fna",
+            "ADK__GCF_000007725.1.fna",
+            "PGK__GCF_000016525.1.fna",
+        ]
+    ).issubset(set(os.listdir(gc.filtered_nucl_fp)))
+
+
+@pytest.fixture
+def packed_gene_collection():
+    yield GeneCollection(
+        os.path.join(TEST_DATA_FP, "collected-genomes"),
+        os.path.join(TEMP_FP, "packed-output/"),
+        "nucl",
+        layout="packed",
+    )
+
+
+def test_packed_gene_collection(packed_gene_collection):
+    gc = packed_gene_collection
+    gc.filter_prot()
+    assert "GCF_000016525.1.faa" in os.listdir(gc.filtered_fp)
+    assert not [fp for fp in os.listdir(gc.filtered_fp) if "__" in fp]
+    gc.filter_nucl()
+    assert "GCF_000016525.1.fna" in os.listdir(gc.filtered_nucl_fp)
+    nucl_mtimes = {
+        fp: os.stat(os.path.join(gc.filtered_nucl_fp, fp)).st_mtime_ns
+        for fp in os.listdir(gc.filtered_nucl_fp)
+    }
+    gc.filter_nucl()
+    assert nucl_mtimes == {
+        fp: os.stat(os.path.join(gc.filtered_nucl_fp, fp)).st_mtime_ns
+        for fp in os.listdir(gc.filtered_nucl_fp)
+    }
+    gc.MAX_OPEN_MERGED = 8  # Forces merge to cycle its writers
+    gc.merge()
+    assert len(os.listdir(gc.merged_fp)) == 71
+    merged = 0
+    for fp in os.listdir(gc.merged_fp):
+        with open(os.path.join(gc.merged_fp, fp)) as f:
+            merged += f.read().count(">")
+    assert merged == len(list(gc.filtered_nucl.records()))
+
+    # Reselecting from the saved hit tables gives the same hits until the cutoff changes
+    assert "GCF_000016525.1.npz" in os.listdir(gc.hits_fp)
+    records = list(gc.filtered.records())
+    gc.reselect()
+    assert list(gc.filtered.records()) == records
+    gc.min_score = 400.0
+    gc.reselect()
+    assert 0 < len(list(gc.filtered.records())) < len(records)
+    assert gc.manifest.hits("GCF_000016525.1") == sorted(
+        cog for cog, name, _, _ in gc.filtered.records() if name == "GCF_000016525.1"
+    )
+
+    # Genomes with new protein hits get their CDS records pulled again
+    gc.filter_nucl()
+    nucl_names = set(gc.filtered_nucl.names())
+    assert sorted(
+        (name, cog) for cog, name, _, _ in gc.filtered_nucl.records()
+    ) == sorted(
+        (name, cog) for cog, name, _, _ in gc.filtered.records() if name in nucl_names
+    )
+
+
+def test_plain_and_gzipped_genome():
+    genomes_fp = os.path.join(TEMP_FP, "plain-and-gzipped-genomes/")
+    os.makedirs(genomes_fp)
+    plain_fp = os.path.join(genomes_fp, "GCF_000016525.1.faa")
+    shutil.copy(
+        os.path.join(TEST_DATA_FP, "collected-genomes", "GCF_000016525.1.faa"), plain_fp
+    )
+    with open(plain_fp, "rb") as f_in, gzip.open(f"{plain_fp}.gz", "wb") as f_out:
+        f_out.write(f_in.read())
+    gc = GeneCollection(genomes_fp, os.path.join(TEMP_FP, "plain-and-gzipped-output/"))
+    gc.filter_prot()
+
+    # Filtered once, from the plain file
+    with open(gc.manifest.manifest_fp) as f:
+        events = [json.loads(l)["event"] for l in f]
+    assert events == ["start", "done"]
+    assert gc.manifest.is_done("GCF_000016525.1", plain_fp)
+
+
+def test_dryrun_is_read_only():
+    output_fp = os.path.join(TEMP_FP, "dryrun-output")
+    write_test_hmms(os.path.join(output_fp, "genes.hmm.gz"))
+    # Finished by an older version, which a real run would record in the manifest
+    os.makedirs(os.path.join(output_fp, "filtered-sequences"))
+    open(
+        os.path.join(output_fp, "filtered-sequences", ".done_GCF_000007725.1"), "w"
+    ).close()
+
+    def listing() -> dict:
+        return {
+            os.path.join(root, fn): os.stat(os.path.join(root, fn)).st_mtime_ns
+            for root, _, fns in os.walk(output_fp)
+            for fn in fns
+        }
+
+    before = listing()
+    estimate = GeneCollection(
+        os.path.join(TEST_DATA_FP, "collected-genomes"), output_fp, "nucl"
+    ).dryrun()
+    assert (
+        estimate["genomes"]
+        == len(
+            [
+                fp
+                for fp in os.listdir(os.path.join(TEST_DATA_FP, "collected-genomes"))
+                if fp[-4:] == ".faa"
+            ]
+        )
+        - 1
+    )
+    assert estimate["cpu_s_per_mb"] > 0
+    assert listing() == before
+    assert sorted(os.listdir(output_fp)) == ["filtered-sequences", "genes.hmm.gz"]
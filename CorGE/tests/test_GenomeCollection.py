@@ -31,7 +31,7 @@ def test_genome_collection_species(genome_collection_species):
     gc.collect()
 
     assert set(os.listdir(GENOMES_FP)) == set(
-        ["GCF_000016525.1.fna", "GCF_000016525.1.faa"]
+        ["GCF_000016525.1.fna.gz", "GCF_000016525.1.faa.gz"]
     )
 
 
@@ -47,7 +47,7 @@ def test_genome_collection_accessions(genome_collection_accessions):
     gc.collect()
 
     assert set(os.listdir(GENOMES_FP)) == set(
-        ["GCF_000007725.1.fna", "GCF_000007725.1.faa"]
+        ["GCF_000007725.1.fna.gz", "GCF_000007725.1.faa.gz"]
     )
 
 
@@ -92,3 +92,11 @@ def test_genome_collection_local(genome_collection_local):
             "GCF_900111765.1.fna",
         ]
     )
+
+
+def test_genome_collection_mirror():
+    gc = GenomeCollection(OUTPUT_FP, ["2173"], mirror="http://mirror.local/ncbi/")
+    assert gc.genomes[0].partial_url.startswith(
+        "http://mirror.local/ncbi/genomes/all/GCF/000/016/525/"
+    )
+    shutil.rmtree(OUTPUT_FP)
@@ -0,0 +1,55 @@
+import numpy as np
+import os
+import pytest
+from src.CorGE.HitTable import Hit, HitTable
+from . import TEMP_FP
+
+
+@pytest.fixture
+def hit_table():
+    rows = [
+        # p1 is ADK's best protein, p2 scores equally for PGK and Ribosomal_L2
+        ("p1", "ADK", 50.0, 1e-12),
+        ("p2", "Ribosomal_L2", 40.0, 1e-9),
+        ("p2", "PGK", 40.0, 1e-9),
+        ("p3", "PGK", 30.0, 1e-6),
+        ("p3", "ADK", 20.0, 1e-3),
+        ("p4", "Adenylsucc_synt", 10.0, 1e-2),
+    ]
+    query, cog, score, evalue = zip(*rows)
+    coords = np.arange(len(rows), dtype=np.int32)
+    yield HitTable(
+        {
+            "query": np.array(query),
+            "cog": np.array(cog),
+            "score": np.array(score, dtype=np.float32),
+            "evalue": np.array(evalue),
+            **{c: coords for c in HitTable.COLUMNS[4:]},
+        }
+    )
+
+
+def test_hit_table_select(hit_table):
+    assert hit_table.select() == [
+        Hit("p1", "ADK", 50.0),
+        Hit("p4", "Adenylsucc_synt", 10.0),
+        Hit("p3", "PGK", 30.0),
+    ]
+    # Kept for PGK, the first of its two genes, where it beats p3
+    assert hit_table.select(ties="first")[2] == Hit("p2", "PGK", 40.0)
+    assert hit_table.select(min_score=15.0, max_evalue=1e-5) == [
+        Hit("p1", "ADK", 50.0),
+        Hit("p3", "PGK", 30.0),
+    ]
+    assert hit_table.select(min_score=100.0) == []
+    with pytest.raises(ValueError):
+        hit_table.select(ties="last")
+
+
+def test_hit_table_save_load(hit_table):
+    fp = os.path.join(TEMP_FP, "GCF_000007725.1.npz")
+    hit_table.save(fp)
+    loaded = HitTable.load(fp)
+    assert len(loaded) == 6
+    assert loaded.select() == hit_table.select()
+    assert not os.path.exists(f"{fp}.tmp")
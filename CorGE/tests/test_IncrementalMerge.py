@@ -0,0 +1,53 @@
+import os
+import pytest
+import shutil
+from src.CorGE.IncrementalMerge import IncrementalMerge
+from . import TEMP_FP
+
+
+def write(fp: str, text: str):
+    os.makedirs(os.path.dirname(fp), exist_ok=True)
+    with open(fp, "w") as f:
+        f.write(text)
+
+
+@pytest.fixture
+def incremental_output():
+    output = os.path.join(TEMP_FP, "incremental-output")
+    merged_fp = os.path.join(output, "merged-sequences")
+    # ADK only gains a sequence, PGK's 10 changed, Adenylsucc_synt was never aligned
+    write(
+        os.path.join(output, "aligned-sequences", "ADK.fasta"),
+        "> 10\nMK-L\n> 20\nmka-\n",
+    )
+    write(os.path.join(output, "aligned-sequences", "PGK.fasta"), "> 10\nMKL\n")
+    write(os.path.join(output, "trees", "RAxML_bestTree.ADK"), "(10,20);\n")
+    write(os.path.join(output, "RAxML_bestTree.supermatrix"), "(10,20);\n")
+    write(os.path.join(merged_fp, "ADK.fasta"), "> 10\nMKL\n> 30\nMKV\n> 20\nMKA\n")
+    write(os.path.join(merged_fp, "PGK.fasta"), "> 10\nMKV\n")
+    write(os.path.join(merged_fp, "Adenylsucc_synt.fasta"), "> 10\nMKV\n")
+    # Left over from an earlier update
+    write(os.path.join(output, "added-sequences", "PGK.fasta"), "> 20\nMKV\n")
+    yield output, merged_fp
+    shutil.rmtree(output)
+
+
+def test_incremental_merge(incremental_output):
+    output, merged_fp = incremental_output
+    im = IncrementalMerge(output)
+
+    assert im.update(merged_fp, ["ADK", "Adenylsucc_synt", "PGK"]) == {"ADK": 1}
+    assert im.read_fasta(os.path.join(im.added_fp, "ADK.fasta")) == [("30", "MKV")]
+    assert os.path.exists(
+        os.path.join(im.previous_fp, "aligned-sequences", "ADK.fasta")
+    )
+    assert os.path.exists(os.path.join(im.previous_fp, "trees", "RAxML_bestTree.ADK"))
+    assert not os.path.exists(os.path.join(im.added_fp, "PGK.fasta"))
+    assert not os.path.exists(os.path.join(im.added_fp, "Adenylsucc_synt.fasta"))
+    # PGK has to be realigned so the supermatrix tree can't constrain the next one
+    assert not os.path.exists(
+        os.path.join(im.previous_fp, "RAxML_bestTree.supermatrix")
+    )
+
+    assert im.update(merged_fp, ["ADK"]) == {"ADK": 1}
+    assert os.path.exists(os.path.join(im.previous_fp, "RAxML_bestTree.supermatrix"))
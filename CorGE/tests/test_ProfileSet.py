@@ -0,0 +1,33 @@
+import os
+import pyhmmer
+import pytest
+from src.CorGE.ProfileSet import ProfileSet
+from . import TEST_DATA_FP, TEMP_FP, write_test_hmms
+
+
+@pytest.fixture
+def hmm_fp():
+    yield write_test_hmms(os.path.join(TEMP_FP, "profile-set", "genes.hmm.gz"))
+
+
+def test_profile_set(hmm_fp):
+    ps = ProfileSet(hmm_fp, press=False)
+    assert len(ps) == 2
+    assert ps.names() == ["ADK", "PGK"]
+    assert not ps.is_pressed()
+
+
+def test_profile_set_pressed(hmm_fp):
+    ps = ProfileSet(hmm_fp)
+    assert ps.is_pressed()
+    assert ps.names() == ["ADK", "PGK"]
+    assert os.path.exists(f"{hmm_fp[:-3]}.h3m")
+
+    with pyhmmer.easel.SequenceFile(
+        os.path.join(TEST_DATA_FP, "collected-genomes", "GCF_000007725.1.faa"),
+        digital=True,
+    ) as seqs_file:
+        proteins = list(seqs_file)
+    top_hits = list(ProfileSet(hmm_fp).search(proteins))
+    assert len(top_hits) == 2
+    assert all(len(hits) > 0 for hits in top_hits)
@@ -0,0 +1,67 @@
+import os
+import pytest
+import shutil
+from src.CorGE.RunManifest import RunManifest
+from . import TEMP_FP
+
+
+@pytest.fixture
+def manifest_fp():
+    fp = os.path.join(TEMP_FP, "run-manifest", ".manifest")
+    os.makedirs(os.path.dirname(fp), exist_ok=True)
+    with open(os.path.join(os.path.dirname(fp), "g1.faa"), "w") as f:
+        f.write(">p1\nMKV\n")
+    yield fp
+    shutil.rmtree(os.path.dirname(fp))
+
+
+def test_run_manifest(manifest_fp):
+    genome_fp = os.path.join(os.path.dirname(manifest_fp), "g1.faa")
+    m = RunManifest(manifest_fp)
+    assert not m.is_started("g1")
+    m.start("g1")
+    m.start("g2")
+    m.done("g1", genome_fp, ["PGK", "ADK"], {"min_score": 400.0, "ties": "drop"})
+
+    m = RunManifest(manifest_fp)
+    assert m.is_done("g1", genome_fp)
+    assert m.hits("g1") == ["ADK", "PGK"]
+    assert m.selection("g1") == {"min_score": 400.0, "ties": "drop"}
+    assert m.selection("g2") is None
+    assert m.is_started("g2") and not m.is_done("g2", genome_fp)
+
+    # Touched but unchanged is still done, changed contents aren't
+    os.utime(genome_fp, ns=(0, 0))
+    assert m.is_done("g1", genome_fp)
+    with open(genome_fp, "w") as f:
+        f.write(">p1\nMKL\n")
+    assert not m.is_done("g1", genome_fp)
+
+
+def test_run_manifest_torn_line(manifest_fp):
+    with open(manifest_fp, "w") as f:
+        f.write('{"event": "done", "genome": "g0", "legacy": true}\n{"event": "do')
+    m = RunManifest(manifest_fp)
+    m.add_legacy("g3")
+
+    m = RunManifest(manifest_fp)
+    assert m.is_done("g0", "") and m.is_done("g3", "")
+
+
+def test_run_manifest_checksum_reuse(manifest_fp):
+    genome_fp = os.path.join(os.path.dirname(manifest_fp), "g1.faa")
+    m = RunManifest(manifest_fp)
+    # A digest of the bytes already read is recorded as given
+    m.start("g1")
+    m.done("g1", genome_fp, ["ADK"], sha256="0" * 64)
+    assert m.entries["g1"]["sha256"] == "0" * 64
+
+    # An unchanged file isn't read again to record it, a changed one is
+    m.start("g1")
+    m.done("g1", genome_fp, ["PGK"])
+    assert m.entries["g1"]["sha256"] == "0" * 64
+    with open(genome_fp, "w") as f:
+        f.write(">p1\nMKLV\n")
+    m.start("g1")
+    m.done("g1", genome_fp, ["PGK"])
+    assert m.entries["g1"]["sha256"] == RunManifest.sha256(genome_fp)
@@ -0,0 +1,35 @@
+import json
+import os
+import pytest
+import shutil
+from src.CorGE.RunReport import RunReport
+from . import TEMP_FP
+
+
+@pytest.fixture
+def report_fp():
+    fp = os.path.join(TEMP_FP, "run-report", "run-report.json")
+    os.makedirs(os.path.dirname(fp), exist_ok=True)
+    yield fp
+    shutil.rmtree(os.path.dirname(fp))
+
+
+def test_run_report(report_fp):
+    r = RunReport(["merge"], os.path.join(os.path.dirname(report_fp), "profile-"))
+    with r.stage("filter_prot"):
+        r.genome("g1", "filter_prot", hits=3, hmmsearch_s=0.5)
+    with r.stage("merge"):
+        sum(range(1000))
+    r.write(report_fp)
+
+    with open(report_fp) as f:
+        report = json.load(f)
+    assert [s["stage"] for s in report["stages"]] == ["filter_prot", "merge"]
+    assert all(
+        s["wall_s"] >= 0 and s["peak_rss_so_far_mb"] > 0 for s in report["stages"]
+    )
+    assert report["genomes"] == {"g1": {"filter_prot": {"hits": 3, "hmmsearch_s": 0.5}}}
+    assert sorted(os.listdir(os.path.dirname(report_fp))) == [
+        "profile-merge.prof",
+        "run-report.json",
+    ]
@@ -1,9 +1,13 @@
 import os
 import shutil
+import subprocess
+import sys
 import tempfile
 import unittest
 
 from CorGE.command import main
+from CorGE.HitTable import HitTable
+from CorGE.RunManifest import RunManifest
 
 
 class CommandTests(unittest.TestCase):
@@ -40,6 +44,27 @@ class CommandTests(unittest.TestCase):
 
         shutil.rmtree(self.temp_dir)
 
+    def test_startup_imports(self):
+        # CorGE is run thousands of times from job arrays, keep --help and parsing quick
+        proc = subprocess.run(
+            [sys.executable, "-X", "importtime", "-c", "import CorGE.command"],
+            capture_output=True,
+            text=True,
+            check=True,
+        )
+        # Modules are listed after the ones they import, so everything
+        # CorGE.command pulls in comes after the CorGE package itself
+        cumulative = {}
+        for line in proc.stderr.splitlines()[1:]:
+            _, us, name = line.split("|")
+            if name.strip() == "CorGE":
+                cumulative = {}
+            cumulative[name.strip()] = int(us)
+
+        for heavy in ["pyhmmer", "numpy", "tqdm", "wget", "CorGE.GeneCollection"]:
+            self.assertNotIn(heavy, cumulative)
+        self.assertLess(cumulative["CorGE.command"], 250000)
+
     def test_collect_genomes(self):
         main(
             [
@@ -142,6 +167,36 @@ class CommandTests(unittest.TestCase):
                 "ATGCATATCGTTTTAATTGGAGGGCCTGGAACAGGAAAAGGAACACAAGCAGAGCTTCTGTCAAAAAAATATATGCTTCCTGTGATTTCTACTGGACATATATTACGAAAGATTAGTACAAAAAAAACATTGTTTGGAGAAAAAATAAAAAATATTATAAATTCAGGAAAATTAGTTCCAGACACTATAATCATTAAAATAATTACAAATGAAATTCTTCATAAAAATTATACAAATGGATTTATTTTAGATGGATTTCCAAGAACAATAAAACAAGCAAAAAATTTAAAAAATACTAATATACAAATAGATTATGTCTTTGAATTTATATTACCAACAAAGTTGATTTTTAAAAGAATACAAACCAGGACAATTAATCCAATAACAGGAACCATATACAATAATGTAATACAAAAAAATTCAGAATTAAAAAATCTTAAAATAAATACCTTAAAAAGTAGACTTGACGATCAATATCCTATAATTCTAAAACGACTAAAAGAACATAAAAAAAACATTGTTTATCTTAAAGATTTTTACATAAACGAACAAAAACATAAAAGTCTTAAATATCATGAAATAAATAGTCAAAATACAATTAAAAATGTTAATATCGAAATAAAAAAAATTCTTGAAAATAAACTTTAA",
             )
 
+    def test_extract_genes_new_cutoff(self):
+        genomes_fp = os.path.join(self.temp_dir, "two-genomes")
+        os.makedirs(genomes_fp)
+        names = ["GCF_000007725.1", "GCF_000016525.1"]
+        for name in names:
+            shutil.copy(
+                os.path.join(self.collected_genomes_fp, f"{name}.faa"), genomes_fp
+            )
+        args = ["extract_genes", "--genomes", genomes_fp, "--output", self.temp_dir]
+        args += ["--name_type", "acc"]
+        main(args)
+        before = len(os.listdir(self.filtered_seqs_fp))
+
+        # Rerunning on the filtered output with a new cutoff applies it to every genome
+        main(args + ["--min_score", "400"])
+        manifest = RunManifest(os.path.join(self.filtered_seqs_fp, ".manifest"))
+        for name in names:
+            table = HitTable.load(
+                os.path.join(self.temp_dir, "hit-tables", f"{name}.npz")
+            )
+            self.assertEqual(
+                manifest.hits(name), [hit.cog for hit in table.select(min_score=400.0)]
+            )
+            self.assertEqual(manifest.selection(name)["min_score"], 400.0)
+        self.assertLess(len(os.listdir(self.filtered_seqs_fp)), before)
+
+        # And running with the old settings again brings the old selection back
+        main(args)
+        self.assertEqual(len(os.listdir(self.filtered_seqs_fp)), before)
+
 
 if __name__ == "__main__":
     unittest.main()
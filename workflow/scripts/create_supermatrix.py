@@ -1,24 +1,78 @@
-quasigenomes = {}
-for fp in snakemake.input:
-    with open(fp) as f:
-        gid = ""
-        for l in f.readlines():
-            if l[0] == ">":
-                gid = l[2:].strip(" \n\r")
+###
+# Lays each gene's reduced alignment out at a fixed column offset in one
+# taxa x columns array, so taxa missing a gene get gaps in exactly its columns
+###
+import os
+import numpy as np
+
+GAP = ord("-")
+
+
+def read_gene(fp: str):
+    """Returns the taxa in a reduced alignment and its taxa x columns array"""
+    with open(fp, "rb") as f:
+        lines = f.read().replace(b"\r", b"").splitlines()
+    headers = lines[0::2]
+    seqs = [l.strip(b" ") for l in lines[1::2]]
+    if not all(h[:1] == b">" for h in headers) or len(set(map(len, seqs))) > 1:
+        # Wrapped or ragged records, join and pad them one at a time
+        headers, seqs = [], []
+        for l in lines:
+            if l[:1] == b">":
+                headers.append(l)
+                seqs.append([])
             else:
-                try:
-                    quasigenomes[gid] += l.strip(" \n\r")
-                except KeyError:
-                    quasigenomes[gid] = l.strip(" \n\r")
-
-    max_row_len = max(map(len, quasigenomes.values()))
-    for k, v in quasigenomes.items():  # Fill missed genes with blanks
-        if len(v) < max_row_len:
-            filler = "-" * (max_row_len - len(v))
-            quasigenomes[k] += filler
-
-with open(snakemake.output[0], "w") as f:
-    for k, v in quasigenomes.items():
-        print(f"{len(v)}")
-        f.write(f"> {k}\n")
-        f.write(f"{v}\n")
+                seqs[-1].append(l.strip(b" "))
+        seqs = [b"".join(seq) for seq in seqs]
+        width = max(map(len, seqs), default=0)
+        seqs = [seq.ljust(width, b"-") for seq in seqs]
+
+    gids = [h[2:].strip(b" ").decode() for h in headers]
+    width = len(seqs[0]) if seqs else 0
+    block = np.frombuffer(b"".join(seqs), np.uint8).reshape(len(seqs), width)
+    return gids, block
+
+
+def layout(genes: list):
+    """Returns each taxon's row, in order of first appearance, and each gene's
+    (name, first column, width) for (name, gids, block) read genes"""
+    rows = {}
+    spans = []
+    offset = 0
+    for gene, gids, block in genes:
+        for gid in gids:
+            rows.setdefault(gid, len(rows))
+        spans.append((gene, offset, block.shape[1]))
+        offset += block.shape[1]
+    return rows, spans
+
+
+def build_supermatrix(fps: list):
+    # Each alignment is read once and its block reused for the layout and the copy
+    genes = [(os.path.splitext(os.path.basename(fp))[0], *read_gene(fp)) for fp in fps]
+    rows, spans = layout(genes)
+    matrix = np.full((len(rows), sum(s[2] for s in spans)), GAP, dtype=np.uint8)
+    for (_, gids, block), (_, offset, width) in zip(genes, spans):
+        matrix[[rows[gid] for gid in gids], offset : offset + width] = block
+    return list(rows.keys()), spans, matrix
+
+
+def write_supermatrix(gids: list, matrix, f_out):
+    for gid, row in zip(gids, matrix):
+        f_out.write(f"> {gid}\n")
+        f_out.write(f"{row.tobytes().decode()}\n")
+
+
+def write_partitions(genes: list, data_type: str, f_out):
+    """Writes a RAxML style partition file, which IQ-TREE also reads"""
+    for gene, offset, width in genes:
+        if width:
+            f_out.write(f"{data_type}, {gene} = {offset + 1}-{offset + width}\n")
+
+
+if __name__ == "__main__":
+    gids, genes, matrix = build_supermatrix([str(fp) for fp in snakemake.input])
+    with open(snakemake.output.supermatrix, "w") as f:
+        write_supermatrix(gids, matrix, f)
+    with open(snakemake.output.partitions, "w") as f:
+        write_partitions(genes, snakemake.params.data_type, f)
@@ -1,41 +1,70 @@
-import csv
-from io import TextIOWrapper
+###
+# Reads each aligned gene once, picks its columns from the in-memory column
+# stats and writes the reduced alignment (and the .stats table if asked for)
+###
+import numpy as np
+from reduce_alignments_stats import MSA, parse_fasta, write_column_stats
 
 
-def read_seqs(f: TextIOWrapper) -> dict:
-    d = dict()
-    current = ""
-    for l in f.readlines():
+def read_alignment(f) -> list:
+    """Returns (header line, sequence) for each record, joining wrapped lines"""
+    records = []
+    for l in f:
         if l[0] == ">":
-            current = l[2:]
-            d[current] = ""
+            records.append((l.rstrip("\r\n"), []))
         else:
-            d[current] += l.strip()
+            records[-1][1].append(l.strip())
+    return [(header, "".join(seq)) for header, seq in records]
 
-    return d
 
-
-# for fp_stats, fp_reduced, fp_seq in zip(snakemake.input.stats, snakemake.output, snakemake.input.seqs):
-with open(str(snakemake.input.stats)) as f_stats, open(
-    str(snakemake.output), "w"
-) as f_reduced, open(str(snakemake.input.seqs)) as f_seq:
-    r_stats = csv.reader(f_stats, delimiter="\t")
-    stats_header = next(r_stats)
+def select_columns(stats: list, bps: int) -> list:
+    """Returns the indices of the bps lowest entropy columns with under half gaps,
+    in alignment order"""
     keepers = list()
-    for l in r_stats:
-        if float(l[2]) < 0.50 and float(l[3]) > 0.0:
-            keepers.append((int(l[0]), float(l[3])))
+    for s in stats:
+        # Compare the values as they're written to the .stats file
+        gaps = float(f"{s['gaps_proportion']:1.2f}")
+        entropy = float(f"{s['entropy']:1.4f}")
+        if gaps < 0.50 and entropy > 0.0:
+            keepers.append((s["column_position"] - 1, entropy))
 
     keepers.sort(key=lambda t: t[1])  # Get n lowest entropy columns
-    keepers = keepers[: int(snakemake.params.bps)]
-    keepers.sort(
-        key=lambda t: t[0]
-    )  # Order by column number to iterate through input fasta
-
-    seqs = read_seqs(f_seq)
-
-    for k, v in seqs.items():
-        f_reduced.write(f"> {k.strip()}\n")
-        for col_num, entropy in keepers:
-            f_reduced.write(f"{v[col_num-1]}")
-        f_reduced.write("\n")
+    return sorted(col for col, entropy in keepers[:bps])
+
+
+def reduce_alignment(f_in, f_reduced, bps: int, f_stats=None):
+    records = read_alignment(f_in)
+    msa = MSA.from_seqs(records)
+    stats_msa = msa
+    if any(c in seq for _, seq in records for c in " U."):
+        # Stats are taken over the cleaned up sequences parse_fasta gives
+        lines = (l for header, seq in records for l in (header, seq))
+        stats_msa = MSA.from_seqs(parse_fasta(lines))
+    stats = list(stats_msa.column_stats())
+    if f_stats:
+        write_column_stats(stats, f_stats)
+    cols = select_columns(stats, bps)
+
+    # Repeated names keep their first position and last sequence
+    rows = {header[2:].strip(): i for i, (header, seq) in enumerate(records)}
+    reduced = msa.arr[list(rows.values())][:, cols]
+    for desc, row in zip(rows.keys(), reduced):
+        f_reduced.write(f"> {desc}\n{row.tobytes().decode()}\n")
+
+
+def reduce_file(in_fp: str, reduced_fp: str, bps: int, stats_fp: str = None):
+    with open(in_fp) as f_in, open(reduced_fp, "w") as f_reduced:
+        if stats_fp:
+            with open(stats_fp, "w") as f_stats:
+                reduce_alignment(f_in, f_reduced, bps, f_stats)
+        else:
+            reduce_alignment(f_in, f_reduced, bps)
+
+
+if __name__ == "__main__":
+    reduce_file(
+        str(snakemake.input),
+        str(snakemake.output.reduced),
+        int(snakemake.params.bps),
+        str(snakemake.output.stats) if hasattr(snakemake.output, "stats") else None,
+    )
@@ -0,0 +1,87 @@
+###
+# Reduces every gene's alignment from one long-lived job with a process pool,
+# instead of paying an interpreter and Snakemake preamble per gene
+# Results are cached by input hash, so genes whose alignment didn't change
+# are copied back rather than recomputed when the batch reruns
+###
+import concurrent.futures
+import hashlib
+import os
+import shutil
+from reduce_alignments import reduce_file
+
+EXTS = [".reduced", ".stats"]
+VERSION = 1  # Bump when reduce_alignments output changes, to drop cached results
+
+
+def cache_key(in_fp: str, bps: int, stats: bool) -> str:
+    h = hashlib.sha256(f"{VERSION} {bps} {stats}\n".encode())
+    with open(in_fp, "rb") as f:
+        for chunk in iter(lambda: f.read(1 << 20), b""):
+            h.update(chunk)
+    return h.hexdigest()[:16]
+
+
+def cached(cache_fp: str, gene: str, key: str, outputs: list) -> list:
+    """Returns each output's cached copy, or None if any is missing"""
+    fps = [os.path.join(cache_fp, f"{gene}.{key}{ext}") for ext in EXTS]
+    fps = [fp for fp, out in zip(fps, outputs) if out]
+    return fps if all(os.path.exists(fp) for fp in fps) else None
+
+
+def store(cache_fp: str, gene: str, key: str, outputs: list):
+    """Replaces gene's cache entry with copies of its new outputs"""
+    for fn in os.listdir(cache_fp):
+        if fn.startswith(f"{gene}."):
+            os.remove(os.path.join(cache_fp, fn))
+    for out, ext in zip(outputs, EXTS):
+        if out:
+            shutil.copyfile(out, os.path.join(cache_fp, f"{gene}.{key}{ext}"))
+
+
+def reduce_genes(jobs: list, bps: int, cache_fp: str, threads: int) -> int:
+    """Reduces each (gene, alignment, reduced, stats or None) job, returns how many
+    had to be computed"""
+    os.makedirs(cache_fp, exist_ok=True)
+    todo = []
+    for gene, in_fp, reduced_fp, stats_fp in jobs:
+        outputs = [reduced_fp, stats_fp]
+        key = cache_key(in_fp, bps, bool(stats_fp))
+        hit = cached(cache_fp, gene, key, outputs)
+        if hit:
+            for fp, out in zip(hit, [o for o in outputs if o]):
+                shutil.copyfile(fp, out)
+        else:
+            todo.append((gene, key, in_fp, outputs))
+
+    with concurrent.futures.ProcessPoolExecutor(max(1, threads)) as executor:
+        futures = {
+            executor.submit(reduce_file, in_fp, outputs[0], bps, outputs[1]): (
+                gene,
+                key,
+                outputs,
+            )
+            for gene, key, in_fp, outputs in todo
+        }
+        for future in concurrent.futures.as_completed(futures):
+            future.result()
+            store(cache_fp, *futures[future])
+    return len(todo)
+
+
+if __name__ == "__main__":
+    genes = snakemake.params.genes
+    stats = list(snakemake.output.stats) if hasattr(snakemake.output, "stats") else []
+    jobs = [
+        (gene, str(in_fp), str(reduced_fp), str(stats[i]) if stats else None)
+        for i, (gene, in_fp, reduced_fp) in enumerate(
+            zip(genes, snakemake.input, snakemake.output.reduced)
+        )
+    ]
+    computed = reduce_genes(
+        jobs, int(snakemake.params.bps), snakemake.params.cache, snakemake.threads
+    )
+    with open(snakemake.log[0], "w") as log:
+        log.write(
+            f"Reduced {computed} of {len(jobs)} alignments, the rest came from cache\n"
+        )
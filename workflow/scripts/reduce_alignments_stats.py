@@ -1,43 +1,42 @@
 ###
 # All code here taken from okfasta
 # https://github.com/kylebittinger/okfasta
+# MSA reworked to compute column statistics with NumPy
 ###
 from io import StringIO
-import collections
 import math
-import itertools
+import numpy as np
 
-
-def enumerate1(xs):
-    for n, x in enumerate(xs):
-        yield (n + 1), x
-
-
-def range1(stop):
-    for n in range(stop):
-        yield (n + 1)
+GAP = ord("-")
 
 
 class MSA:
-    def __init__(self, descs, cols):
+    """Alignment stored as a 2-D uint8 array, one row per sequence and one column
+    per alignment position, so column statistics are computed for all columns at once"""
+
+    def __init__(self, descs, arr):
         self.descs = descs
-        self.cols = cols
+        self.arr = arr
 
         # Double check that length of each column is equal to number
         # of sequence descriptions
-        len_descs = len(descs)
-        for col in self.cols:
-            assert len(col) == len_descs
+        assert self.arr.shape[0] == len(descs)
+
+    @property
+    def cols(self):
+        return [col.tobytes().decode() for col in self.arr.T]
 
     def filter(self, fcn):
-        self.cols = [col for col in self.cols if fcn(col)]
+        self.arr = self.arr[:, [bool(fcn(col)) for col in self.cols]]
         return self
 
     def filter_by_index(self, idxs, remove=False):
         idxs = set(idxs)
         if remove:
-            idxs = [idx for idx in range1(len(self.cols)) if idx not in idxs]
-        self.cols = [col for idx, col in enumerate1(self.cols) if idx in idxs]
+            idxs = [idx for idx in range(1, self.arr.shape[1] + 1) if idx not in idxs]
+        self.arr = self.arr[
+            :, [idx - 1 for idx in sorted(idxs) if 0 < idx <= self.arr.shape[1]]
+        ]
         return self
 
     def map(self, fcn):
@@ -55,13 +54,43 @@ class MSA:
     column_stats_fmt = "{0}\t{1}\t{2:1.2f}\t{3:1.4f}\t{4}\t{5:1.2f}"
 
     def column_stats(self):
-        for col_position, col in enumerate1(self.cols):
-            len_col = len(col)
-            ngaps = col.count("-")
-            nvals = len_col - ngaps
-            if nvals == 0:
+        len_col, n_cols = self.arr.shape
+        cols = np.ascontiguousarray(self.arr.T)
+
+        # Symbol counts for every column in one bincount over (column, byte) pairs
+        keys = np.arange(n_cols, dtype=np.int64)[:, np.newaxis] * 256 + cols
+        counts = np.bincount(keys.ravel(), minlength=256 * n_cols).reshape(n_cols, 256)
+        ngaps = counts[:, GAP].copy()
+        nvals = len_col - ngaps
+        counts[:, GAP] = 0
+        symbols = np.flatnonzero(counts.any(axis=0))
+        if not len(symbols):
+            symbols = np.array([GAP])  # All gaps, nothing to count
+        counts = counts[:, symbols]
+
+        # Order each column's symbols by the row they first show up in, like the
+        # insertion order of the collections.Counter this replaces
+        first = np.full(counts.shape, len_col)
+        for i, symbol in enumerate(symbols):
+            if symbol != GAP:
+                is_symbol = cols == symbol
+                first[:, i] = np.where(
+                    counts[:, i] > 0, is_symbol.argmax(axis=1), len_col
+                )
+        order = np.argsort(first, axis=1, kind="stable")
+        counts = np.take_along_axis(counts, order, axis=1)
+        ordered_symbols = symbols[order]
+
+        # Most common symbol, ties go to the one seen first (like Counter.most_common)
+        consensus_idx = counts.argmax(axis=1)
+        consensus_cts = np.take_along_axis(counts, consensus_idx[:, np.newaxis], axis=1)
+
+        entropy = self.__entropy(counts, nvals)
+
+        for i in range(n_cols):
+            if nvals[i] == 0:
                 yield {
-                    "column_position": col_position,
+                    "column_position": i + 1,
                     "number_of_values": 0,
                     "gaps_proportion": 1.0,
                     "entropy": 0.0,
@@ -69,47 +98,53 @@ class MSA:
                     "consensus_proportion": 1.0,
                 }
                 continue
-            ctr = collections.Counter(col)
-            del ctr["-"]
-            cts = ctr.values()
-            consensus_val, consensus_cts = ctr.most_common(1)[0]
             yield {
-                "column_position": col_position,
-                "number_of_values": nvals,
-                "gaps_proportion": ngaps / len_col,
-                "entropy": shannon(cts),
-                "consensus_value": consensus_val,
-                "consensus_proportion": consensus_cts / nvals,
+                "column_position": i + 1,
+                "number_of_values": int(nvals[i]),
+                "gaps_proportion": int(ngaps[i]) / len_col,
+                "entropy": float(entropy[i]),
+                "consensus_value": chr(ordered_symbols[i, consensus_idx[i]]),
+                "consensus_proportion": int(consensus_cts[i, 0]) / int(nvals[i]),
             }
 
+    @staticmethod
+    def __entropy(counts, nvals):
+        """Shannon entropy of each column (row of counts)"""
+        # Terms come from math.log on the distinct (count, total) pairs and are added
+        # left to right, so every value matches the old sum() based version to the
+        # last bit. Python 3.12's sum() compensates its rounding, which is why
+        # envs/numpy.yaml pins python 3.11
+        totals = np.broadcast_to(nvals[:, np.newaxis], counts.shape)
+        pairs, inverse = np.unique(
+            np.stack([counts.ravel(), totals.ravel()]), axis=1, return_inverse=True
+        )
+        terms = np.array(
+            [
+                (c / t) * math.log(c / t) if c > 0 else 0.0
+                for c, t in zip(pairs[0].tolist(), pairs[1].tolist())
+            ]
+        )[inverse.ravel()].reshape(counts.shape)
+        entropy = np.zeros(counts.shape[0])
+        for term in terms.T:  # Left to right like sum()
+            entropy = entropy + term
+        entropy = -entropy
+        # If we use the formula when h=0, python will return -0.0
+        entropy[np.count_nonzero(counts, axis=1) <= 1] = 0.0
+        return entropy
+
     @property
     def seqs(self):
-        seqvals = map(strcat, zip(*self.cols))
+        seqvals = (row.tobytes().decode() for row in self.arr)
         yield from zip(self.descs, seqvals)
 
     @classmethod
     def from_seqs(cls, seqs):
         descs, seqvals = list(zip(*seqs))
-        cols = [
-            strcat(col_chars)
-            for col_chars in itertools.zip_longest(*seqvals, fillvalue="-")
-        ]
-        return cls(descs, cols)
-
-
-def shannon(cts):
-    cts = [c for c in cts if c > 0]
-    # If we use the formula when h=0, python will return -0.0
-    if len(cts) == 1:
-        return 0.0
-    total = sum(cts)
-    props = [c / total for c in cts]
-    h = -sum(p * math.log(p) for p in props)
-    return h
-
-
-def strcat(xs):
-    return "".join(xs)
+        width = max(len(seqval) for seqval in seqvals)
+        arr = np.full((len(seqvals), width), GAP, dtype=np.uint8)
+        for i, seqval in enumerate(seqvals):
+            arr[i, : len(seqval)] = np.frombuffer(seqval.encode("ascii"), np.uint8)
+        return cls(descs, arr)
 
 
 def parse_fasta(f, trim_desc=False):
@@ -132,12 +167,15 @@ def parse_fasta(f, trim_desc=False):
     yield desc, seq.getvalue()
 
 
-with open(str(snakemake.input)) as f_in, open(str(snakemake.output), "w") as f_out:
-    seqs = parse_fasta(f_in)
-    msa = MSA.from_seqs(seqs)
-    f_out.write("\t".join(msa.column_stats_header))
+def write_column_stats(stats, f_out):
+    f_out.write("\t".join(MSA.column_stats_header))
     f_out.write("\n")
-    for stats_result in msa.column_stats():
+    for stats_result in stats:
         stats_values = stats_result.values()
-        f_out.write(msa.column_stats_fmt.format(*stats_values))
+        f_out.write(MSA.column_stats_fmt.format(*stats_values))
         f_out.write("\n")
+
+
+if __name__ == "__main__":
+    with open(str(snakemake.input)) as f_in, open(str(snakemake.output), "w") as f_out:
+        write_column_stats(MSA.from_seqs(parse_fasta(f_in)).column_stats(), f_out)
@@ -0,0 +1,148 @@
+###
+# Roots an unrooted newick tree on the branch leading to the outgroup, without
+# the tree search raxmlHPC -t -o does, so it's quick for trees of any size
+###
+class Node:
+    __slots__ = ("name", "length", "children", "parent")
+
+    def __init__(self, parent=None):
+        self.name = ""
+        self.length = None
+        self.children = []
+        self.parent = parent
+
+
+def parse_newick(text: str) -> Node:
+    """Parses one newick tree without recursion, internal node names are kept as
+    the label (e.g. support) of the branch above them"""
+    root = node = Node()
+    i = 0
+    text = text.strip().rstrip(";")
+    while i < len(text):
+        c = text[i]
+        if c == "(":
+            child = Node(node)
+            node.children.append(child)
+            node = child
+            i += 1
+        elif c == ",":
+            child = Node(node.parent)
+            node.parent.children.append(child)
+            node = child
+            i += 1
+        elif c == ")":
+            node = node.parent
+            i += 1
+        elif c == ":":
+            j = i + 1
+            while j < len(text) and text[j] not in ",);":
+                j += 1
+            node.length = float(text[i + 1 : j])
+            i = j
+        elif c == "'":
+            parts = []
+            j = i + 1
+            while True:
+                k = text.index("'", j)
+                parts.append(text[j:k])
+                if text[k + 1 : k + 2] != "'":
+                    break
+                parts.append("'")  # A doubled quote is a quote in the name
+                j = k + 2
+            node.name = "".join(parts)
+            i = k + 1
+        else:
+            j = i
+            while j < len(text) and text[j] not in ",():;":
+                j += 1
+            node.name = text[i:j].strip()
+            i = j
+    return root
+
+
+def quote(name: str) -> str:
+    """Quotes names that can't be written bare, like those parse_newick unquoted"""
+    if any(c in name for c in " \t'[],():;"):
+        return "'" + name.replace("'", "''") + "'"
+    return name
+
+
+def write_newick(root: Node) -> str:
+    """Writes a tree back out as newick without recursion"""
+    out = []
+    stack = [(root, False)]
+    while stack:
+        node, done = stack.pop()
+        if node == ",":
+            out.append(",")
+            continue
+        if node.children and not done:
+            out.append("(")
+            stack.append((node, True))
+            for i, child in enumerate(reversed(node.children)):
+                stack.append((child, False))
+                if i < len(node.children) - 1:
+                    stack.append((",", None))
+            continue
+        if node.children:
+            out.append(")")
+        out.append(quote(node.name))
+        if node.length is not None and node is not root:
+            out.append(f":{node.length!r}")
+    return "".join(out) + ";"
+
+
+def leaves(root: Node):
+    stack = [root]
+    while stack:
+        node = stack.pop()
+        if node.children:
+            stack.extend(node.children)
+        else:
+            yield node
+
+
+def reroot(root: Node, outgroup: str) -> Node:
+    """Returns a new root halfway along the outgroup's branch"""
+    leaf = next((l for l in leaves(root) if l.name == outgroup), None)
+    if leaf is None:
+        raise ValueError(f"Outgroup {outgroup} isn't in the tree")
+    if leaf.parent is None:
+        return root
+
+    half = leaf.length / 2 if leaf.length is not None else None
+    new_root = Node()
+    parent = leaf.parent
+    parent.children.remove(leaf)
+    leaf.parent = new_root
+    leaf.length = half
+    new_root.children = [leaf, parent]
+
+    # Turn the path from the outgroup's parent up to the old root around
+    prev, node, edge = new_root, parent, (half, "")
+    while node is not None:
+        up = node.parent
+        up_edge = (node.length, node.name)
+        node.parent = prev
+        node.length, node.name = edge
+        if up is not None:
+            up.children.remove(node)
+            node.children.append(up)
+        prev, node, edge = node, up, up_edge
+
+    # A bifurcating old root is left with one child, fold it into that branch
+    if len(prev.children) == 1:
+        child = prev.children[0]
+        if prev.length is not None or child.length is not None:
+            child.length = (prev.length or 0.0) + (child.length or 0.0)
+        child.parent = prev.parent
+        siblings = prev.parent.children
+        siblings[siblings.index(prev)] = child
+    return new_root
+
+
+if __name__ == "__main__":
+    with open(str(snakemake.input)) as f:
+        tree = parse_newick(f.read())
+    with open(str(snakemake.output), "w") as f:
+        f.write(write_newick(reroot(tree, str(snakemake.params.outgroup))) + "\n")